@@ -0,0 +1,933 @@
+"""
+Camada de armazenamento compartilhada pelas páginas do inventário.
+
+Os dados ficam em um banco SQLite com chave primária no código do item
+(BMP), o que permite buscar e gravar um único item sem
+ler ou reescrever o inventário inteiro.
+
+As leituras completas passam por um cache único do processo, compartilhado
+por todas as páginas e sessões do Streamlit.
+
+Cada escrita é uma transação curta no journal (WAL) do SQLite, feita com a
+trava de escrita obtida antes da leitura, de modo que sessões simultâneas
+não sobrescrevem as alterações umas das outras. Após LIMITE_COMPACTACAO
+alterações, o journal é incorporado ao arquivo principal em segundo plano
+(checkpoint PASSIVE, que não bloqueia as escritas). O CSV da base só é gerado
+sob pedido (`exportar_csv`), de forma atômica.
+
+Cadastros, exclusões e mudanças de situação ou comentário são acrescentados,
+na mesma transação, à tabela `historico`, que nunca é reescrita e não entra
+nas leituras do inventário.
+
+Cada escrita também registra, na tabela `mudancas`, os códigos alterados na
+nova versão da base; assim, quem guarda dados derivados (como os índices de
+`busca`) relê só os itens alterados por outros processos (ver `mudancas_desde`).
+
+As contagens do painel (itens por apartamento e situação, e por dia da última
+inspeção) ficam nas tabelas `resumo_situacao` e `resumo_inspecao`, atualizadas
+pela diferença de cada escrita na mesma transação; o painel não precisa
+percorrer o inventário.
+"""
+import os
+import csv
+import sqlite3
+import tempfile
+import threading
+import contextlib
+import argparse
+from collections import Counter
+
+import pandas as pd
+
+import esquema
+import metricas
+
+# --- CONFIGURAÇÕES GERAIS ---
+NOME_BANCO = 'inventario_h8.db'
+LIMITE_COMPACTACAO = 200
+# Versões guardadas no registro de mudanças (`mudancas`); um índice mais atrasado que isso relê a base
+RETENCAO_MUDANCAS = 100000
+# Campos cujas mudanças entram no histórico de inspeções
+CAMPOS_HISTORICO = ['situacao', 'ultimo_comentario']
+# Momento da última inspeção de um item: a última atualização ou, sem ela, o cadastro
+_INSPECAO = "COALESCE(NULLIF(data_atualizacao, ''), data_cadastro)"
+
+# Bases guardadas no banco; todas as páginas usam o inventário unificado (ver `esquema`).
+BASES = {
+    'inventario': {
+        'tabela': 'inventario',
+        'arquivo_csv': 'inventario_h8.csv',
+        'chave': esquema.CHAVE,
+        'colunas': esquema.COLUNAS,
+        'colunas_texto': ['Itens', 'ultimo_comentario'],
+        'obrigatorias': ['BMP', 'Itens', 'apartamento', 'situacao'],
+    },
+}
+
+_local = threading.local()
+_banco_preparado = False
+_preparo_trava = threading.Lock()
+
+# Cache das bases: base -> (assinatura do arquivo, geração, DataFrame)
+_cache = {}
+_cache_trava = threading.RLock()
+_geracoes = {base: 0 for base in BASES}
+
+# Funções chamadas após cada escrita: funcao(base, versao, alteracoes)
+_observadores = []
+
+# Alterações feitas desde a última compactação e compactações em andamento
+_pendentes = {base: 0 for base in BASES}
+_compactando = set()
+_compactacao_trava = threading.Lock()
+
+
+# --- CONEXÃO ---
+def conectar():
+    """Retorna a conexão SQLite da thread atual; a primeira do processo também prepara o banco."""
+    conexao = getattr(_local, 'conexao', None)
+    if conexao is None:
+        # As escritas abrem a transação explicitamente (ver `_transacao`)
+        conexao = sqlite3.connect(NOME_BANCO, timeout=30, isolation_level='IMMEDIATE')
+        conexao.row_factory = sqlite3.Row
+        conexao.execute('PRAGMA synchronous=NORMAL')
+        _local.conexao = conexao
+    if not _banco_preparado:
+        _preparar_banco(conexao)
+    return conexao
+
+
+def _preparar_banco(conexao):
+    """
+    Liga o WAL e cria as tabelas que faltam, uma única vez por processo.
+    O Streamlit usa uma thread nova em quase toda re-execução; essas conexões
+    só leem e não disputam a trava de escrita com as gravações em andamento.
+    """
+    global _banco_preparado
+    with _preparo_trava:
+        if _banco_preparado:
+            return
+        conexao.execute('PRAGMA journal_mode=WAL')
+        if not _banco_completo(conexao):
+            _garantir_tabelas(conexao)
+        _banco_preparado = True
+
+
+def _banco_completo(conexao):
+    """Verifica (só com leituras) se todas as tabelas, índices e versões já existem."""
+    esperados = {
+        'versoes', 'mudancas', 'mudancas_versao', 'historico', 'historico_item', 'historico_momento',
+        'resumo_situacao', 'resumo_inspecao',
+    }
+    for config in BASES.values():
+        tabela = config['tabela']
+        esperados |= {tabela, f'{tabela}_apartamento', f'{tabela}_situacao', f'{tabela}_inspecao'}
+    existentes = {linha[0] for linha in conexao.execute('SELECT name FROM sqlite_master')}
+    if not esperados <= existentes:
+        return False
+    return set(BASES) <= {linha[0] for linha in conexao.execute('SELECT base FROM versoes')}
+
+
+def _garantir_tabelas(conexao):
+    """
+    Cria as tabelas das bases e migra os dados antigos na primeira execução.
+    Tudo acontece em uma única transação: se a migração falhar, a tabela nova
+    também é desfeita e a migração é tentada de novo na próxima conexão.
+    """
+    migradas = []
+    with _transacao(conexao):
+        # Contador de versão de cada base, incrementado em toda transação de escrita
+        conexao.execute('CREATE TABLE IF NOT EXISTS versoes (base TEXT PRIMARY KEY, versao INTEGER NOT NULL)')
+        conexao.executemany(
+            'INSERT OR IGNORE INTO versoes (base, versao) VALUES (?, 0)', [(base,) for base in BASES]
+        )
+        # Códigos alterados em cada versão (codigo NULL: a base inteira foi substituída)
+        conexao.execute('CREATE TABLE IF NOT EXISTS mudancas (base TEXT NOT NULL, versao INTEGER NOT NULL, codigo TEXT)')
+        conexao.execute('CREATE INDEX IF NOT EXISTS mudancas_versao ON mudancas (base, versao)')
+        # Histórico de inspeções: só recebe inserções; os índices atendem à linha
+        # do tempo de um item e às consultas por período sem varrer a tabela
+        conexao.execute(
+            'CREATE TABLE IF NOT EXISTS historico ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, base TEXT NOT NULL, codigo TEXT NOT NULL, '
+            'momento TEXT NOT NULL, evento TEXT NOT NULL, situacao TEXT NOT NULL DEFAULT \'\', '
+            'comentario TEXT NOT NULL DEFAULT \'\')'
+        )
+        conexao.execute('CREATE INDEX IF NOT EXISTS historico_item ON historico (base, codigo, momento)')
+        conexao.execute('CREATE INDEX IF NOT EXISTS historico_momento ON historico (base, momento)')
+        # Resumos mantidos a cada escrita: itens por apartamento x situação e por dia da última inspeção
+        resumos_novos = not _existe_tabela(conexao, 'resumo_situacao')
+        conexao.execute(
+            'CREATE TABLE IF NOT EXISTS resumo_situacao (base TEXT NOT NULL, apartamento TEXT NOT NULL, '
+            'situacao TEXT NOT NULL, quantidade INTEGER NOT NULL, PRIMARY KEY (base, apartamento, situacao))'
+        )
+        conexao.execute(
+            'CREATE TABLE IF NOT EXISTS resumo_inspecao (base TEXT NOT NULL, dia TEXT NOT NULL, '
+            'quantidade INTEGER NOT NULL, PRIMARY KEY (base, dia))'
+        )
+        for base, config in BASES.items():
+            tabela = config['tabela']
+            nova = not _existe_tabela(conexao, tabela)
+            definicoes = [
+                f'"{col}" TEXT PRIMARY KEY' if col == config['chave'] else f'"{col}" TEXT NOT NULL DEFAULT \'\''
+                for col in config['colunas']
+            ]
+            conexao.execute(f'CREATE TABLE IF NOT EXISTS "{tabela}" ({", ".join(definicoes)})')
+            # Índices das listas filtradas do painel (o da inspeção é sobre a mesma expressão de `_INSPECAO`)
+            conexao.execute(f'CREATE INDEX IF NOT EXISTS "{tabela}_apartamento" ON "{tabela}" (apartamento, situacao)')
+            conexao.execute(f'CREATE INDEX IF NOT EXISTS "{tabela}_situacao" ON "{tabela}" (situacao)')
+            conexao.execute(f'CREATE INDEX IF NOT EXISTS "{tabela}_inspecao" ON "{tabela}" ({_INSPECAO})')
+            if nova:
+                migradas.append((base, _migrar(base, conexao)))
+            elif resumos_novos:
+                _reconstruir_resumos(conexao, base)
+    for base, versao in migradas:
+        _avisar_substituicao(base, versao)
+
+
+@contextlib.contextmanager
+def _transacao(conexao):
+    """
+    Transação de escrita com a trava obtida (BEGIN IMMEDIATE) antes de qualquer
+    leitura, evitando o "lê-modifica-grava" concorrente. Sozinho, o sqlite3 só
+    abriria a transação no primeiro INSERT/UPDATE/DELETE, depois das leituras.
+    """
+    with conexao:
+        conexao.execute('BEGIN IMMEDIATE')
+        yield conexao
+
+
+def _existe_tabela(conexao, nome):
+    return conexao.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (nome,)).fetchone() is not None
+
+
+def _config(base):
+    if base not in BASES:
+        raise KeyError(f'Base de dados desconhecida: {base}')
+    return BASES[base]
+
+
+def _lista_sql(colunas):
+    return ', '.join(f'"{col}"' for col in colunas)
+
+
+def normalizar_colunas(df, colunas):
+    """Garante todas as colunas, na ordem esperada, como texto sem valores nulos."""
+    for col in colunas:
+        if col not in df.columns:
+            df[col] = ''
+    return df[colunas].fillna('').astype(str)
+
+
+# --- CACHE ---
+def _assinatura_arquivo():
+    """Data de modificação e tamanho do banco (e do seu journal), para detectar escritas externas."""
+    assinatura = []
+    for caminho in (NOME_BANCO, NOME_BANCO + '-wal'):
+        try:
+            info = os.stat(caminho)
+            assinatura.append((info.st_mtime_ns, info.st_size))
+        except FileNotFoundError:
+            assinatura.append(None)
+    return tuple(assinatura)
+
+
+def _invalidar(base):
+    """Descarta o DataFrame em cache da base após uma escrita feita por este processo."""
+    with _cache_trava:
+        _geracoes[base] += 1
+        _cache.pop(base, None)
+
+
+def limpar_cache():
+    """Descarta o cache de todas as bases."""
+    for base in BASES:
+        _invalidar(base)
+
+
+# --- LEITURA ---
+@metricas.medir('armazenamento.carregar_dados')
+def carregar_dados(base, copiar=False):
+    """
+    Retorna todos os itens da base em um DataFrame, na ordem de cadastro.
+    O DataFrame vem do cache do processo, compartilhado entre as sessões, como
+    uma visão sem cópia: com o copy-on-write do pandas 3, alterar a visão copia
+    só a coluna alterada, sem afetar o cache nem as outras sessões. Com
+    `copiar=True` vem uma cópia completa e independente.
+    """
+    _config(base)
+    with _cache_trava:
+        assinatura = _assinatura_arquivo()
+        entrada = _cache.get(base)
+        if entrada and entrada[0] == assinatura and entrada[1] == _geracoes[base]:
+            df = entrada[2]
+        else:
+            df = _ler_base(base)
+            _cache[base] = (assinatura, _geracoes[base], df)
+    return df.copy(deep=copiar)
+
+
+def _ler_base(base):
+    """Lê a base inteira do banco, sem passar pelo cache."""
+    config = _config(base)
+    conexao = conectar()
+    colunas = _lista_sql(config['colunas'])
+    df = pd.read_sql_query(
+        f'SELECT {colunas} FROM "{config["tabela"]}" ORDER BY rowid', conexao, dtype=str
+    )
+    return esquema.aplicar_tipos(normalizar_colunas(df, config['colunas']))
+
+
+@metricas.medir('armazenamento.buscar_item')
+def buscar_item(base, codigo):
+    """Busca um único item pelo código (consulta pelo índice da chave primária)."""
+    return _ler_item(conectar(), _config(base), codigo)
+
+
+@metricas.medir('armazenamento.carregar_pagina')
+def carregar_pagina(base, pagina, tamanho_pagina, **filtros):
+    """
+    Carrega apenas uma página de itens (na ordem de cadastro), direto do banco.
+    `pagina` começa em 1. Aceita os filtros de `_filtros_sql` (apartamento,
+    situacao, sem_inspecao_dias); com sem_inspecao_dias, os itens vêm do
+    inspecionado há mais tempo para o mais recente.
+    """
+    config = _config(base)
+    inicio = max(pagina - 1, 0) * tamanho_pagina
+    condicoes, parametros = _filtros_sql(**filtros)
+    where = 'WHERE ' + ' AND '.join(condicoes) if condicoes else ''
+    ordem = _INSPECAO if filtros.get('sem_inspecao_dias') is not None else 'rowid'
+    df = pd.read_sql_query(
+        f'SELECT {_lista_sql(config["colunas"])} FROM "{config["tabela"]}" {where} '
+        f'ORDER BY {ordem} LIMIT ? OFFSET ?',
+        conectar(), params=(*parametros, tamanho_pagina, inicio), dtype=str
+    )
+    return esquema.aplicar_tipos(normalizar_colunas(df, config['colunas']))
+
+
+def _limite_inspecao(dias):
+    """Data (texto ISO) antes da qual um item está há mais de `dias` dias sem inspeção."""
+    return (pd.Timestamp.now().normalize() - pd.Timedelta(days=int(dias))).strftime('%Y-%m-%d')
+
+
+def _filtros_sql(apartamento=None, situacao=None, sem_inspecao_dias=None):
+    """Condições SQL dos filtros; apartamento e situação aceitam um valor ou uma lista de valores."""
+    condicoes, parametros = [], []
+    for coluna, valor in (('apartamento', apartamento), ('situacao', situacao)):
+        if isinstance(valor, (list, tuple, set)):
+            condicoes.append(f'{coluna} IN ({", ".join("?" for _ in valor)})')
+            parametros.extend(valor)
+        elif valor is not None:
+            condicoes.append(f'{coluna} = ?')
+            parametros.append(valor)
+    if sem_inspecao_dias is not None:
+        condicoes.append(f'{_INSPECAO} < ?')
+        parametros.append(_limite_inspecao(sem_inspecao_dias))
+    return condicoes, parametros
+
+
+def buscar_itens(base, codigos):
+    """Busca vários itens pelo código de uma só vez. Retorna um DataFrame na ordem de `codigos`."""
+    config = _config(base)
+    df = pd.DataFrame(buscar_registros(base, codigos), columns=config['colunas'])
+    return esquema.aplicar_tipos(normalizar_colunas(df, config['colunas']))
+
+
+def buscar_registros(base, codigos):
+    """
+    Como `buscar_itens`, mas retorna uma lista de dicionários de texto, sem
+    montar DataFrames (para consultas pequenas e frequentes, como as do `servico`).
+    """
+    config = _config(base)
+    codigos = list(dict.fromkeys(str(c) for c in codigos))
+    encontrados = _ler_itens(conectar(), config, codigos)
+    return [encontrados[codigo] for codigo in codigos if codigo in encontrados]
+
+
+def versao_base(base):
+    """Versão atual da base; muda a cada escrita, feita por qualquer processo."""
+    _config(base)
+    return conectar().execute('SELECT versao FROM versoes WHERE base = ?', (base,)).fetchone()[0]
+
+
+@metricas.medir('armazenamento.contar_itens')
+def contar_itens(base, apartamento=None, situacao=None, sem_inspecao_dias=None):
+    """
+    Retorna a quantidade de itens da base (com os mesmos filtros de `carregar_pagina`).
+    A contagem vem das tabelas de resumo, sem percorrer o inventário.
+    """
+    config = _config(base)
+    conexao = conectar()
+    if sem_inspecao_dias is None:
+        condicoes, parametros = _filtros_sql(apartamento, situacao)
+        sql = 'SELECT COALESCE(SUM(quantidade), 0) FROM resumo_situacao WHERE ' + ' AND '.join(['base = ?'] + condicoes)
+        return conexao.execute(sql, (base, *parametros)).fetchone()[0]
+    if apartamento is None and situacao is None:
+        return conexao.execute(
+            'SELECT COALESCE(SUM(quantidade), 0) FROM resumo_inspecao WHERE base = ? AND dia < ?',
+            (base, _limite_inspecao(sem_inspecao_dias))
+        ).fetchone()[0]
+    # Combinação sem resumo próprio: contagem pelo índice da inspeção
+    condicoes, parametros = _filtros_sql(apartamento, situacao, sem_inspecao_dias)
+    sql = f'SELECT COUNT(*) FROM "{config["tabela"]}" WHERE ' + ' AND '.join(condicoes)
+    return conexao.execute(sql, parametros).fetchone()[0]
+
+
+def resumo_situacoes(base):
+    """Quantidade de itens por apartamento e situação (DataFrame apartamento, situacao, quantidade)."""
+    _config(base)
+    return pd.read_sql_query(
+        'SELECT apartamento, situacao, quantidade FROM resumo_situacao WHERE base = ? ORDER BY apartamento, situacao',
+        conectar(), params=(base,)
+    )
+
+
+# --- ESCRITA ---
+def salvar_item(base, item):
+    """
+    Insere ou atualiza um único item (upsert pela chave).
+    Apenas as colunas presentes em `item` são alteradas em um item existente.
+    """
+    salvar_itens(base, [item])
+
+
+@metricas.medir('armazenamento.salvar_itens')
+def salvar_itens(base, itens):
+    """Insere ou atualiza vários itens em uma única transação (mesmas regras de `salvar_item`)."""
+    config = _config(base)
+    chave = config['chave']
+    itens = list(itens)
+    for item in itens:
+        if not item.get(chave):
+            raise ValueError(f'O campo "{chave}" é obrigatório.')
+    if not itens:
+        return
+    conexao = conectar()
+    alteracoes = []
+    with _transacao(conexao):
+        for item in itens:
+            colunas = [col for col in config['colunas'] if col in item]
+            valores = ['' if item[col] is None else str(item[col]) for col in colunas]
+            antes = _ler_item(conexao, config, item[chave])
+            conexao.execute(_sql_upsert(config, tuple(colunas)), valores)
+            alteracoes.append((antes, _ler_item(conexao, config, item[chave])))
+        _registrar_historico(conexao, base, alteracoes)
+        _atualizar_resumos(conexao, base, alteracoes)
+        versao = _incrementar_versao(conexao, base, [item[chave] for item in itens])
+    _registrar_escrita(base, len(itens), versao, alteracoes)
+
+
+def importar_itens(base, df, atualizar=False, colunas=None):
+    """
+    Grava um lote de itens já validados (DataFrame com as colunas da base) em uma
+    única transação. Com `atualizar`, códigos existentes são atualizados apenas
+    nas `colunas` informadas (as que vieram na planilha; por padrão, todas); sem
+    ele, são ignorados. Itens novos sem data de cadastro e itens atualizados sem
+    data de atualização recebem a data atual. Retorna a quantidade de linhas gravadas.
+    """
+    config = _config(base)
+    chave = config['chave']
+    df = esquema.padronizar(df)
+    if df.empty:
+        return 0
+    atualizadas = [col for col in config['colunas'] if col != chave and (colunas is None or col in colunas)]
+    if 'data_atualizacao' not in atualizadas:
+        atualizadas.append('data_atualizacao')
+    agora = esquema.agora()
+    conexao = conectar()
+    with _transacao(conexao):
+        antes = _ler_itens(conexao, config, df[chave].tolist())
+        existe = df[chave].isin(list(antes))
+        df.loc[~existe & (df['data_cadastro'] == ''), 'data_cadastro'] = agora
+        if atualizar:
+            # Uma data de cadastro em branco na planilha não apaga a que já está no banco
+            sem_cadastro = existe & (df['data_cadastro'] == '')
+            df.loc[sem_cadastro, 'data_cadastro'] = [antes[c]['data_cadastro'] for c in df.loc[sem_cadastro, chave]]
+            df.loc[existe & (df['data_atualizacao'] == ''), 'data_atualizacao'] = agora
+        registros = df.to_dict('records')
+        if atualizar:
+            alteracoes = [
+                (antes[item[chave]], {**antes[item[chave]], **{col: item[col] for col in atualizadas}})
+                if item[chave] in antes else (None, item)
+                for item in registros
+            ]
+            sql = _sql_upsert(config, tuple(config['colunas']), tuple(atualizadas))
+        else:
+            # Sem atualização, códigos já existentes não são alterados
+            alteracoes = [(None, item) for item in registros if item[chave] not in antes]
+            sql = (
+                f'INSERT OR IGNORE INTO "{config["tabela"]}" ({_lista_sql(config["colunas"])}) '
+                f'VALUES ({", ".join("?" for _ in config["colunas"])})'
+            )
+        cursor = conexao.executemany(sql, df.itertuples(index=False, name=None))
+        gravados = cursor.rowcount
+        _registrar_historico(conexao, base, alteracoes)
+        if df[chave].duplicated().any():
+            _reconstruir_resumos(conexao, base)
+        else:
+            _atualizar_resumos(conexao, base, alteracoes)
+        versao = _incrementar_versao(conexao, base, df[chave].tolist())
+    if gravados != len(alteracoes):
+        # Códigos repetidos no próprio lote: os observadores recarregam a base
+        alteracoes = None
+    _registrar_escrita(base, gravados, versao, alteracoes)
+    return gravados
+
+
+def _sql_upsert(config, colunas, atualizadas=None):
+    """Upsert pela chave; em um item existente só as `atualizadas` mudam (por padrão, todas as `colunas`)."""
+    chave = config['chave']
+    atualizadas = colunas if atualizadas is None else atualizadas
+    atualizacoes = [f'"{col}" = excluded."{col}"' for col in atualizadas if col != chave]
+    return (
+        f'INSERT INTO "{config["tabela"]}" ({_lista_sql(colunas)}) '
+        f'VALUES ({", ".join("?" for _ in colunas)}) '
+        f'ON CONFLICT("{chave}") DO '
+        + (f'UPDATE SET {", ".join(atualizacoes)}' if atualizacoes else 'NOTHING')
+    )
+
+
+def apagar_itens(base, codigos):
+    """Apaga os itens com os códigos informados e retorna quantos foram removidos."""
+    config = _config(base)
+    # Códigos repetidos seriam descontados mais de uma vez dos resumos e do histórico
+    codigos = list(dict.fromkeys(str(c) for c in codigos))
+    if not codigos:
+        return 0
+    conexao = conectar()
+    with _transacao(conexao):
+        removidos = [item for item in (_ler_item(conexao, config, c) for c in codigos) if item]
+        conexao.executemany(
+            f'DELETE FROM "{config["tabela"]}" WHERE "{config["chave"]}" = ?', [(c,) for c in codigos]
+        )
+        _registrar_historico(conexao, base, [(item, None) for item in removidos])
+        _atualizar_resumos(conexao, base, [(item, None) for item in removidos])
+        versao = _incrementar_versao(conexao, base, [item[config['chave']] for item in removidos])
+    _registrar_escrita(base, len(removidos), versao, [(item, None) for item in removidos])
+    return len(removidos)
+
+
+@metricas.medir('armazenamento.salvar_dados')
+def salvar_dados(base, df):
+    """Substitui todo o conteúdo da base pelo DataFrame informado (em uma única transação)."""
+    config = _config(base)
+    df = esquema.padronizar(df)
+    df = df[df[config['chave']] != ''].drop_duplicates(subset=config['chave'], keep='last')
+    colunas = _lista_sql(config['colunas'])
+    marcadores = ', '.join('?' for _ in config['colunas'])
+    conexao = conectar()
+    with _transacao(conexao):
+        anterior = pd.read_sql_query(
+            f'SELECT {colunas} FROM "{config["tabela"]}"', conexao, dtype=str
+        )
+        conexao.execute(f'DELETE FROM "{config["tabela"]}"')
+        conexao.executemany(
+            f'INSERT INTO "{config["tabela"]}" ({colunas}) VALUES ({marcadores})',
+            df.itertuples(index=False, name=None)
+        )
+        _registrar_historico(conexao, base, _diferencas(config, anterior, df))
+        _reconstruir_resumos(conexao, base)
+        versao = _incrementar_versao(conexao, base, None)
+    _registrar_escrita(base, LIMITE_COMPACTACAO, versao, None)
+
+
+def _ler_item(conexao, config, codigo):
+    linha = conexao.execute(
+        f'SELECT {_lista_sql(config["colunas"])} FROM "{config["tabela"]}" WHERE "{config["chave"]}" = ?',
+        (str(codigo),)
+    ).fetchone()
+    return dict(linha) if linha else None
+
+
+def _ler_itens(conexao, config, codigos):
+    """Dicionário código -> item para os códigos existentes."""
+    chave = config['chave']
+    itens = {}
+    # O SQLite limita a quantidade de parâmetros por consulta
+    for inicio in range(0, len(codigos), 900):
+        lote = codigos[inicio:inicio + 900]
+        cursor = conexao.execute(
+            f'SELECT {_lista_sql(config["colunas"])} FROM "{config["tabela"]}" '
+            f'WHERE "{chave}" IN ({", ".join("?" for _ in lote)})', lote
+        )
+        itens.update((linha[chave], dict(linha)) for linha in cursor)
+    return itens
+
+
+def _incrementar_versao(conexao, base, codigos):
+    """
+    Passa a base para a próxima versão e registra em `mudancas` os `codigos`
+    alterados nela (None quando a base inteira foi substituída).
+    """
+    conexao.execute('UPDATE versoes SET versao = versao + 1 WHERE base = ?', (base,))
+    versao = conexao.execute('SELECT versao FROM versoes WHERE base = ?', (base,)).fetchone()[0]
+    codigos = [None] if codigos is None else dict.fromkeys(codigos)
+    conexao.executemany(
+        'INSERT INTO mudancas (base, versao, codigo) VALUES (?, ?, ?)', [(base, versao, c) for c in codigos]
+    )
+    return versao
+
+
+def mudancas_desde(base, versao):
+    """
+    Códigos alterados na base depois da `versao` informada, por qualquer processo.
+    Retorna (versão atual, códigos); os códigos são None quando a base foi
+    substituída inteira nesse intervalo ou quando `versao` é mais antiga que o
+    registro guardado; nesses casos é preciso reler a base.
+    """
+    _config(base)
+    atual = versao_base(base)
+    if versao < 0 or atual - versao > RETENCAO_MUDANCAS // 2:
+        return atual, None
+    linhas = conectar().execute(
+        'SELECT codigo FROM mudancas WHERE base = ? AND versao > ? AND versao <= ?', (base, versao, atual)
+    ).fetchall()
+    codigos = list(dict.fromkeys(linha[0] for linha in linhas))
+    return atual, None if None in codigos else codigos
+
+
+# --- HISTÓRICO DE INSPEÇÕES ---
+def _registrar_historico(conexao, base, alteracoes):
+    """
+    Acrescenta ao histórico (na mesma transação da escrita) os cadastros, as
+    exclusões e as mudanças de situação ou de comentário em `alteracoes`.
+    """
+    momento = esquema.agora()
+    linhas = []
+    for antes, depois in alteracoes:
+        if depois is None:
+            evento, item = 'exclusao', antes
+        elif antes is None:
+            evento, item = 'cadastro', depois
+        elif any(antes.get(col, '') != depois.get(col, '') for col in CAMPOS_HISTORICO):
+            evento, item = 'alteracao', depois
+        else:
+            continue
+        linhas.append((
+            base, item[_config(base)['chave']], momento, evento,
+            item.get('situacao', ''), item.get('ultimo_comentario', '')
+        ))
+    if linhas:
+        conexao.executemany(
+            'INSERT INTO historico (base, codigo, momento, evento, situacao, comentario) VALUES (?, ?, ?, ?, ?, ?)',
+            linhas
+        )
+
+
+def _diferencas(config, anterior, novo):
+    """Pares (antes, depois) dos itens que mudaram entre dois DataFrames de texto da base."""
+    chave = config['chave']
+    juntos = anterior[[chave] + CAMPOS_HISTORICO].merge(
+        novo[[chave] + CAMPOS_HISTORICO], on=chave, how='outer', suffixes=('_antes', ''), indicator=True
+    )
+    campos = [f'{col}_antes' for col in CAMPOS_HISTORICO] + CAMPOS_HISTORICO
+    juntos[campos] = juntos[campos].fillna('')
+    mudou = juntos['_merge'] != 'both'
+    for col in CAMPOS_HISTORICO:
+        mudou |= juntos[f'{col}_antes'] != juntos[col]
+    alteracoes = []
+    for linha in juntos[mudou].to_dict('records'):
+        antes = {chave: linha[chave], **{col: linha[f'{col}_antes'] for col in CAMPOS_HISTORICO}}
+        depois = {chave: linha[chave], **{col: linha[col] for col in CAMPOS_HISTORICO}}
+        alteracoes.append((
+            None if linha['_merge'] == 'right_only' else antes,
+            None if linha['_merge'] == 'left_only' else depois,
+        ))
+    return alteracoes
+
+
+# --- RESUMOS (PAINEL) ---
+def _dia_inspecao(item):
+    return (item.get('data_atualizacao') or item.get('data_cadastro') or '')[:10]
+
+
+def _atualizar_resumos(conexao, base, alteracoes):
+    """
+    Aplica aos resumos (na mesma transação da escrita) a diferença de cada par
+    (antes, depois): o item sai da contagem antiga e entra na nova.
+    """
+    situacoes, dias = Counter(), Counter()
+    for antes, depois in alteracoes:
+        for item, sinal in ((antes, -1), (depois, 1)):
+            if item is not None:
+                situacoes[item.get('apartamento', ''), item.get('situacao', '')] += sinal
+                dias[_dia_inspecao(item)] += sinal
+    situacoes = [(base, *grupo, n) for grupo, n in situacoes.items() if n]
+    dias = [(base, dia, n) for dia, n in dias.items() if n]
+    if situacoes:
+        conexao.executemany(
+            'INSERT INTO resumo_situacao (base, apartamento, situacao, quantidade) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(base, apartamento, situacao) DO UPDATE SET quantidade = quantidade + excluded.quantidade',
+            situacoes
+        )
+        conexao.execute('DELETE FROM resumo_situacao WHERE base = ? AND quantidade = 0', (base,))
+    if dias:
+        conexao.executemany(
+            'INSERT INTO resumo_inspecao (base, dia, quantidade) VALUES (?, ?, ?) '
+            'ON CONFLICT(base, dia) DO UPDATE SET quantidade = quantidade + excluded.quantidade',
+            dias
+        )
+        conexao.execute('DELETE FROM resumo_inspecao WHERE base = ? AND quantidade = 0', (base,))
+
+
+def _reconstruir_resumos(conexao, base):
+    """Recalcula os resumos a partir da tabela (usado quando a base inteira é substituída)."""
+    tabela = _config(base)['tabela']
+    conexao.execute('DELETE FROM resumo_situacao WHERE base = ?', (base,))
+    conexao.execute('DELETE FROM resumo_inspecao WHERE base = ?', (base,))
+    conexao.execute(
+        'INSERT INTO resumo_situacao (base, apartamento, situacao, quantidade) '
+        f'SELECT ?, apartamento, situacao, COUNT(*) FROM "{tabela}" GROUP BY apartamento, situacao',
+        (base,)
+    )
+    conexao.execute(
+        'INSERT INTO resumo_inspecao (base, dia, quantidade) '
+        f'SELECT ?, substr({_INSPECAO}, 1, 10), COUNT(*) FROM "{tabela}" GROUP BY 2',
+        (base,)
+    )
+
+
+def historico_item(base, codigo):
+    """Linha do tempo de um item (mais antigo primeiro): momento, evento, situação e comentário."""
+    _config(base)
+    df = pd.read_sql_query(
+        'SELECT momento, evento, situacao, comentario FROM historico '
+        'WHERE base = ? AND codigo = ? ORDER BY momento, id',
+        conectar(), params=(base, str(codigo))
+    )
+    return _tipar_historico(df)
+
+
+def historico_periodo(base, inicio, fim, limite=None):
+    """
+    Alterações de todos os itens com momento entre `inicio` (inclusive) e `fim`
+    (exclusive), em ordem cronológica. Aceita datetime, date ou texto.
+    """
+    _config(base)
+    inicio = pd.Timestamp(inicio).strftime(esquema.FORMATO_DATA)
+    fim = pd.Timestamp(fim).strftime(esquema.FORMATO_DATA)
+    sql = (
+        'SELECT codigo, momento, evento, situacao, comentario FROM historico '
+        'WHERE base = ? AND momento >= ? AND momento < ? ORDER BY momento, id'
+    )
+    parametros = [base, inicio, fim]
+    if limite is not None:
+        sql += ' LIMIT ?'
+        parametros.append(int(limite))
+    df = pd.read_sql_query(sql, conectar(), params=parametros)
+    return _tipar_historico(df)
+
+
+def _tipar_historico(df):
+    df['momento'] = pd.to_datetime(df['momento'], format=esquema.FORMATO_DATA).astype('datetime64[ns]')
+    for col in ('evento', 'situacao'):
+        df[col] = df[col].astype('category')
+    return df
+
+
+def registrar_observador(funcao):
+    """
+    Registra uma função chamada após cada escrita bem-sucedida, como
+    funcao(base, versao, alteracoes). `alteracoes` é uma lista de pares
+    (item_antes, item_depois), com None para item inexistente, ou None quando
+    a base inteira foi substituída.
+    """
+    if funcao not in _observadores:
+        _observadores.append(funcao)
+
+
+def _registrar_escrita(base, quantidade, versao, alteracoes):
+    """Invalida o cache, avisa os observadores e agenda a compactação quando há alterações suficientes."""
+    _invalidar(base)
+    for funcao in list(_observadores):
+        funcao(base, versao, alteracoes)
+    with _compactacao_trava:
+        _pendentes[base] += quantidade
+        if _pendentes[base] < LIMITE_COMPACTACAO or base in _compactando:
+            return
+        _pendentes[base] = 0
+        _compactando.add(base)
+    threading.Thread(target=_compactar_em_segundo_plano, args=(base,), daemon=True).start()
+
+
+# --- COMPACTAÇÃO ---
+@contextlib.contextmanager
+def _trava_arquivo(caminho):
+    """Trava exclusiva entre processos, usando um arquivo '.lock' ao lado de `caminho`."""
+    with open(caminho + '.lock', 'a+') as arquivo_trava:
+        if os.name == 'nt':
+            import msvcrt
+            arquivo_trava.seek(0)
+            msvcrt.locking(arquivo_trava.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(arquivo_trava.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == 'nt':
+                arquivo_trava.seek(0)
+                msvcrt.locking(arquivo_trava.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(arquivo_trava.fileno(), fcntl.LOCK_UN)
+
+
+def iterar_linhas(base, tamanho_bloco=5000, conexao=None):
+    """Percorre a base em blocos de tuplas (na ordem de cadastro), sem carregá-la inteira."""
+    config = _config(base)
+    cursor = (conexao or conectar()).execute(
+        f'SELECT {_lista_sql(config["colunas"])} FROM "{config["tabela"]}" ORDER BY rowid'
+    )
+    while True:
+        linhas = cursor.fetchmany(tamanho_bloco)
+        if not linhas:
+            break
+        yield [tuple(linha) for linha in linhas]
+
+
+def escrever_csv(base, arquivo, conexao=None):
+    """Escreve a base em CSV no arquivo de texto informado, bloco a bloco."""
+    escritor = csv.writer(arquivo)
+    escritor.writerow(_config(base)['colunas'])
+    for bloco in iterar_linhas(base, conexao=conexao):
+        escritor.writerows(bloco)
+
+
+def exportar_csv(base, destino=None):
+    """
+    Exporta a base para o CSV (por padrão, o `arquivo_csv` da base).
+    O CSV é escrito em um arquivo temporário e renomeado, então nunca fica pela metade.
+    """
+    config = _config(base)
+    destino = os.path.abspath(destino or config['arquivo_csv'])
+    with _trava_arquivo(destino):
+        descritor, temporario = tempfile.mkstemp(
+            prefix='.tmp-', suffix='.csv', dir=os.path.dirname(destino)
+        )
+        try:
+            with os.fdopen(descritor, 'w', newline='', encoding='utf-8') as arquivo:
+                escrever_csv(base, arquivo)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+            os.replace(temporario, destino)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temporario)
+            raise
+    return destino
+
+
+def compactar(base):
+    """
+    Descarta do registro de mudanças as versões além de RETENCAO_MUDANCAS e
+    incorpora ao arquivo principal o journal (WAL) até onde nenhuma leitura em
+    andamento precisa dele. O modo PASSIVE não espera leitores nem bloqueia escritores.
+    """
+    _config(base)
+    conexao = conectar()
+    with _transacao(conexao):
+        conexao.execute(
+            'DELETE FROM mudancas WHERE base = ? AND versao <= '
+            '(SELECT versao FROM versoes WHERE base = ?) - ?', (base, base, RETENCAO_MUDANCAS)
+        )
+    conexao.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+
+def _compactar_em_segundo_plano(base):
+    try:
+        compactar(base)
+    except Exception as e:
+        print(f'Falha ao compactar a base "{base}": {e}')
+    finally:
+        with _compactacao_trava:
+            _compactando.discard(base)
+
+
+# --- IMPORTAÇÃO DOS CSVs ANTIGOS ---
+def importar_csv(base, caminho=None, conexao=None):
+    """
+    Importa um arquivo CSV (em qualquer um dos esquemas antigos) para a base.
+    Linhas sem código são ignoradas e códigos repetidos mantêm a última ocorrência.
+    Retorna a quantidade de itens importados.
+    """
+    config = _config(base)
+    caminho = caminho or config['arquivo_csv']
+    conexao = conexao or conectar()
+    df = esquema.padronizar(pd.read_csv(caminho, dtype=str))
+    df = df[df[config['chave']] != ''].drop_duplicates(subset=config['chave'], keep='last')
+    with _transacao(conexao):
+        versao = _gravar_migracao(base, conexao, df, substituir=False)
+    _avisar_substituicao(base, versao)
+    return len(df)
+
+
+def migrar(base, conexao=None):
+    """
+    Junta no inventário unificado os dados das bases antigas ('itens' e
+    'inventario_geral'): a tabela antiga do banco, se existir, ou o CSV antigo.
+    Os itens já presentes na base entram na mesclagem, então a migração pode ser
+    repetida sem perder alterações. Retorna a quantidade de itens na base.
+    """
+    _config(base)
+    conexao = conexao or conectar()
+    with _transacao(conexao):
+        versao = _migrar(base, conexao)
+        total = conexao.execute(f'SELECT COUNT(*) FROM "{BASES[base]["tabela"]}"').fetchone()[0]
+    _avisar_substituicao(base, versao)
+    return total
+
+
+def _migrar(base, conexao):
+    """Mescla a base com as fontes antigas dentro da transação em andamento; retorna a nova versão."""
+    config = _config(base)
+    colunas = _lista_sql(config['colunas'])
+    fontes = [pd.read_sql_query(f'SELECT {colunas} FROM "{config["tabela"]}"', conexao, dtype=str)]
+    for tabela, arquivo in esquema.FONTES_LEGADAS.items():
+        if _existe_tabela(conexao, tabela):
+            fontes.append(pd.read_sql_query(f'SELECT * FROM "{tabela}"', conexao, dtype=str))
+        elif os.path.exists(arquivo):
+            fontes.append(pd.read_csv(arquivo, dtype=str))
+    df = esquema.unificar(*(esquema.padronizar(fonte) for fonte in fontes))
+    return _gravar_migracao(base, conexao, df, substituir=True)
+
+
+def _gravar_migracao(base, conexao, df, substituir):
+    """Grava os itens migrados na transação em andamento e retorna a nova versão da base."""
+    config = _config(base)
+    if substituir:
+        conexao.execute(f'DELETE FROM "{config["tabela"]}"')
+    conexao.executemany(
+        f'INSERT OR REPLACE INTO "{config["tabela"]}" ({_lista_sql(config["colunas"])}) '
+        f'VALUES ({", ".join("?" for _ in config["colunas"])})',
+        df[config['colunas']].itertuples(index=False, name=None)
+    )
+    _reconstruir_resumos(conexao, base)
+    return _incrementar_versao(conexao, base, None)
+
+
+def _avisar_substituicao(base, versao):
+    """Após uma migração já gravada: descarta o cache e avisa os observadores que a base mudou inteira."""
+    _invalidar(base)
+    for funcao in list(_observadores):
+        funcao(base, versao, None)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migra, importa e exporta os dados do inventário no banco SQLite.')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    parser_migrar = subparsers.add_parser('migrar', help='Junta as bases antigas (itens e inventário geral) no inventário unificado')
+    parser_migrar.add_argument('--base', choices=sorted(BASES), default='inventario')
+    parser_importar = subparsers.add_parser('importar', help='Importa um arquivo CSV para a base')
+    parser_importar.add_argument('arquivo', nargs='?', help='Arquivo CSV de origem (padrão: o CSV da base)')
+    parser_importar.add_argument('--base', choices=sorted(BASES), default='inventario')
+    parser_exportar = subparsers.add_parser('exportar', help='Exporta a base para CSV')
+    parser_exportar.add_argument('arquivo', nargs='?', help='Arquivo CSV de destino (padrão: o CSV da base)')
+    parser_exportar.add_argument('--base', choices=sorted(BASES), default='inventario')
+    args = parser.parse_args()
+    if args.comando == 'migrar':
+        total = migrar(args.base)
+        print(f'Base "{args.base}" migrada: {total} item(s) em {NOME_BANCO}.')
+    elif args.comando == 'exportar':
+        print(f'Base "{args.base}" exportada para {exportar_csv(args.base, args.arquivo)}.')
+    else:
+        total = importar_csv(args.base, args.arquivo)
+        print(f'{total} item(s) importados para a base "{args.base}" em {NOME_BANCO}.')
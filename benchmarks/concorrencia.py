@@ -0,0 +1,102 @@
+"""
+Verificação de escritas concorrentes: vários processos gravando e apagando os mesmos itens.
+
+Cada processo faz PROCESSOS x ESCRITAS chamadas de `salvar_item` (trocando a
+situação e o comentário) e de `apagar_itens` sobre poucos códigos, para forçar
+disputa pela trava de escrita. No final, os resumos mantidos incrementalmente
+(`resumo_situacao` e `resumo_inspecao`) são comparados com um GROUP BY sobre a
+tabela do inventário; qualquer diferença indica leitura fora da transação.
+
+Uso:
+    python benchmarks/concorrencia.py [--processos 4] [--escritas 300] [--codigos 3]
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+import multiprocessing
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(RAIZ))
+
+PROCESSOS = 4
+ESCRITAS = 300
+CODIGOS = 3
+BASE = 'inventario'
+
+
+def escrever(pasta, semente, escritas, codigos):
+    """Roda no processo filho: mistura gravações e exclusões dos mesmos códigos."""
+    os.chdir(pasta)
+    import armazenamento
+    import esquema
+
+    sorteio = random.Random(semente)
+    for _ in range(escritas):
+        codigo = str(sorteio.randrange(codigos))
+        if sorteio.random() < 0.1:
+            armazenamento.apagar_itens(BASE, [codigo, codigo])
+            continue
+        armazenamento.salvar_item(BASE, {
+            'BMP': codigo, 'Itens': f'Item {codigo}', 'apartamento': sorteio.choice(['101', '102']),
+            'situacao': sorteio.choice(esquema.OPCOES_SITUACAO), 'ultimo_comentario': str(sorteio.random()),
+            'data_atualizacao': f'2024-01-{sorteio.randint(1, 28):02d} 10:00:00',
+        })
+
+
+def comparar_resumos():
+    """Lista de diferenças entre os resumos mantidos e os recalculados pelo GROUP BY."""
+    import armazenamento
+
+    conexao = armazenamento.conectar()
+    tabela = armazenamento.BASES[BASE]['tabela']
+    consultas = {
+        'resumo_situacao': (
+            'SELECT apartamento, situacao, quantidade FROM resumo_situacao WHERE base = ?',
+            f'SELECT apartamento, situacao, COUNT(*) FROM "{tabela}" GROUP BY apartamento, situacao',
+        ),
+        'resumo_inspecao': (
+            'SELECT dia, quantidade FROM resumo_inspecao WHERE base = ?',
+            f'SELECT substr({armazenamento._INSPECAO}, 1, 10), COUNT(*) FROM "{tabela}" GROUP BY 1',
+        ),
+    }
+    diferencas = []
+    for nome, (mantido, recalculado) in consultas.items():
+        esperado = sorted(tuple(linha) for linha in conexao.execute(recalculado))
+        obtido = sorted(tuple(linha) for linha in conexao.execute(mantido, (BASE,)))
+        if esperado != obtido:
+            diferencas.append(f'{nome}: mantido {obtido} != recalculado {esperado}')
+    return diferencas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processos', type=int, default=PROCESSOS)
+    parser.add_argument('--escritas', type=int, default=ESCRITAS)
+    parser.add_argument('--codigos', type=int, default=CODIGOS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='concorrencia_inventario_') as pasta:
+        contexto = multiprocessing.get_context('spawn')
+        processos = [
+            contexto.Process(target=escrever, args=(pasta, semente, args.escritas, args.codigos))
+            for semente in range(args.processos)
+        ]
+        for processo in processos:
+            processo.start()
+        for processo in processos:
+            processo.join()
+        if any(processo.exitcode for processo in processos):
+            sys.exit('Um dos processos de escrita falhou.')
+        os.chdir(pasta)
+        diferencas = comparar_resumos()
+        os.chdir(RAIZ)
+    if diferencas:
+        print('\n'.join(diferencas), file=sys.stderr)
+        sys.exit(1)
+    print(f'{args.processos} processos x {args.escritas} escritas: resumos consistentes com a tabela.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark do OCR das etiquetas: latência e acerto sobre uma pasta de fotos.
+
+O número esperado de cada foto vem do início do nome do arquivo
+(ex.: "123456.jpg" ou "123456_reflexo.png").
+
+Uso:
+    python benchmarks/ocr_etiquetas.py caminho/das/fotos [--saida resultado.json]
+"""
+import os
+import re
+import io
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytesseract  # noqa: E402
+from PIL import Image  # noqa: E402
+
+import ocr  # noqa: E402
+
+EXTENSOES = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def ler_simples(dados):
+    """Leitura anterior: imagem inteira em escala de cinza com --psm 11."""
+    image = Image.open(io.BytesIO(dados)).convert('L')
+    texto_extraido = pytesseract.image_to_string(image, config=ocr.CONFIGS_TESSERACT['psm11'])
+    match = re.search(r'\d+', texto_extraido)
+    return match.group(0) if match else ""
+
+
+METODOS = {
+    'simples': ler_simples,
+    'votacao': ocr.ler_numero_etiqueta,
+}
+
+
+def carregar_amostras(pasta):
+    amostras = []
+    for nome in sorted(os.listdir(pasta)):
+        match = re.match(r'\d+', nome)
+        if match and nome.lower().endswith(EXTENSOES):
+            with open(os.path.join(pasta, nome), 'rb') as arquivo:
+                amostras.append((nome, match.group(0), arquivo.read()))
+    return amostras
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p / 100), len(ordenados) - 1)]
+
+
+def medir(metodo, amostras):
+    latencias, acertos, erros = [], 0, []
+    for nome, esperado, dados in amostras:
+        inicio = time.perf_counter()
+        lido = metodo(dados)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        if lido == esperado:
+            acertos += 1
+        else:
+            erros.append({'arquivo': nome, 'esperado': esperado, 'lido': lido})
+    return {
+        'amostras': len(amostras),
+        'acuracia': acertos / len(amostras),
+        'latencia_ms': {
+            'media': statistics.mean(latencias),
+            'p50': percentil(latencias, 50),
+            'p95': percentil(latencias, 95),
+        },
+        'erros': erros,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pasta', help='Pasta com as fotos das etiquetas')
+    parser.add_argument('--metodos', nargs='+', choices=sorted(METODOS), default=sorted(METODOS))
+    parser.add_argument('--saida', help='Arquivo JSON para gravar o resultado')
+    args = parser.parse_args()
+
+    amostras = carregar_amostras(args.pasta)
+    if not amostras:
+        parser.error(f'Nenhuma foto com o número no nome foi encontrada em {args.pasta}')
+
+    resultado = {metodo: medir(METODOS[metodo], amostras) for metodo in args.metodos}
+    for metodo, medidas in resultado.items():
+        latencia = medidas['latencia_ms']
+        print(
+            f"{metodo:>8}: acurácia {medidas['acuracia']:.1%} | "
+            f"latência média {latencia['media']:.0f} ms, p50 {latencia['p50']:.0f} ms, p95 {latencia['p95']:.0f} ms"
+        )
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+"""
+Benchmark das páginas com inventários sintéticos (latência e pico de memória).
+
+Para cada tamanho é gerado um inventário nos dois esquemas antigos
+('Inventario-H8 - itens.csv' com BMP/Itens e 'inventario_geral_h8.csv' com
+codigo_barras/nome_item), migrado para um banco novo em uma pasta temporária.
+As interações críticas de cada página são executadas pelo AppTest do
+Streamlit: abrir a página (tabela paginada e formulário de exclusão), buscar
+um BMP, salvar uma atualização e cadastrar um item. O OCR é medido sobre
+etiquetas sintéticas (ou sobre uma pasta de fotos com --fotos).
+
+Cada tamanho roda em um processo separado, para que caches e memória de um
+não influenciem o outro. O resultado é um JSON com latência (ms) e pico de
+memória alocada (MB, pelo tracemalloc) de cada operação.
+
+Uso:
+    python benchmarks/paginas.py [--tamanhos 1000 10000] [--repeticoes 5] [--saida resultado.json]
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+import statistics
+import tracemalloc
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+TAMANHOS = [1_000, 10_000, 100_000, 1_000_000]
+REPETICOES = 5
+TEMPO_LIMITE_PAGINA = 600
+AMOSTRAS_OCR = 5
+
+PAGINAS = {
+    'gerenciar': os.path.join(RAIZ, 'main_page.py'),
+    'cadastro': os.path.join(RAIZ, 'app_principal.py'),
+    'inspecao': os.path.join(RAIZ, 'pages', 'inspecao_app.py'),
+}
+NOMES = ['Cadeira', 'Mesa', 'Armário', 'Geladeira', 'Fogão', 'Sofá', 'Cama', 'Estante', 'Ventilador', 'Televisor']
+ADJETIVOS = ['de escritório', 'giratória', 'de madeira', 'de aço', 'duplex', 'pequeno', 'grande', 'branco']
+
+
+# --- Inventário sintético ---
+def gerar_inventario(tamanho, pasta, semente=42):
+    """
+    Grava os dois CSVs antigos com `tamanho` itens no total: metade em cada
+    esquema, com 10% dos códigos repetidos nos dois arquivos.
+    Retorna a lista de códigos gerados.
+    """
+    import esquema
+
+    gerador = np.random.default_rng(semente)
+    codigos = (1_000_000 + gerador.permutation(tamanho * 5)[:tamanho]).astype(str)
+    nomes = np.char.add(
+        np.char.add(np.array(NOMES)[gerador.integers(len(NOMES), size=tamanho)], ' '),
+        np.array(ADJETIVOS)[gerador.integers(len(ADJETIVOS), size=tamanho)]
+    )
+    apartamentos = np.char.add('Apto ', gerador.integers(100, 400, size=tamanho).astype(str))
+    situacoes = np.array(esquema.OPCOES_SITUACAO)[gerador.integers(len(esquema.OPCOES_SITUACAO), size=tamanho)]
+    inicio = np.datetime64('2023-01-01T00:00:00')
+    segundos = gerador.integers(0, 2 * 365 * 24 * 3600, size=tamanho)
+    datas = pd.Series(inicio + segundos.astype('timedelta64[s]')).dt.strftime(esquema.FORMATO_DATA_LEGADO)
+    comentarios = np.where(gerador.random(tamanho) < 0.2, 'Pequenos arranhões na lateral', '')
+
+    base = pd.DataFrame({
+        'apartamento': apartamentos, 'situacao': situacoes,
+        'data_cadastro': datas, 'data_atualizacao': '', 'ultimo_comentario': comentarios,
+    })
+    metade = tamanho // 2
+    repetidos = slice(metade - tamanho // 10, metade)
+    itens = base.iloc[:metade].assign(BMP=codigos[:metade], Itens=nomes[:metade])
+    geral = pd.concat([base.iloc[metade:], base.iloc[repetidos]]).assign(
+        codigo_barras=np.concatenate([codigos[metade:], codigos[repetidos]]),
+        nome_item=np.concatenate([nomes[metade:], nomes[repetidos]]),
+    )
+    itens.to_csv(os.path.join(pasta, esquema.FONTES_LEGADAS['itens']), index=False)
+    geral.to_csv(os.path.join(pasta, esquema.FONTES_LEGADAS['inventario_geral']), index=False)
+    return codigos.tolist()
+
+
+def gerar_etiquetas(codigos, quantidade=AMOSTRAS_OCR, semente=42):
+    """Fotos sintéticas de etiquetas: o número em preto sobre fundo claro, com ruído."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    try:
+        fonte = ImageFont.load_default(size=96)
+    except TypeError:  # Pillow < 10.1
+        fonte = ImageFont.load_default()
+    gerador = np.random.default_rng(semente)
+    amostras = []
+    for codigo in random.Random(semente).sample(codigos, min(quantidade, len(codigos))):
+        imagem = Image.new('L', (1600, 1200), 200)
+        desenho = ImageDraw.Draw(imagem)
+        desenho.rectangle((400, 450, 1200, 750), fill=250, outline=30, width=6)
+        desenho.text((480, 540), codigo, fill=10, font=fonte)
+        ruido = gerador.normal(0, 12, (1200, 1600))
+        imagem = Image.fromarray(np.clip(np.asarray(imagem) + ruido, 0, 255).astype(np.uint8)).convert('RGB')
+        saida = io.BytesIO()
+        imagem.save(saida, format='JPEG', quality=85)
+        amostras.append((codigo, saida.getvalue()))
+    return amostras
+
+
+def carregar_fotos(pasta):
+    """Fotos reais cujo nome começa com o número esperado (mesmo formato de benchmarks/ocr_etiquetas.py)."""
+    import re
+
+    amostras = []
+    for nome in sorted(os.listdir(pasta)):
+        match = re.match(r'\d+', nome)
+        if match and nome.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.webp')):
+            with open(os.path.join(pasta, nome), 'rb') as arquivo:
+                amostras.append((match.group(0), arquivo.read()))
+    return amostras
+
+
+# --- Medição ---
+def medir(executar, preparar=lambda: None, repeticoes=REPETICOES):
+    """
+    Executa `executar(contexto)` `repeticoes` vezes (o `preparar` não é medido) e
+    mais uma vez com o tracemalloc ligado, só para o pico de memória.
+    """
+    latencias = []
+    for _ in range(repeticoes):
+        contexto = preparar()
+        inicio = time.perf_counter()
+        executar(contexto)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    contexto = preparar()
+    tracemalloc.start()
+    try:
+        executar(contexto)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    latencias.sort()
+    return {
+        'repeticoes': repeticoes,
+        'latencia_ms': {
+            'min': latencias[0],
+            'p50': statistics.median(latencias),
+            'p95': latencias[min(int(len(latencias) * 0.95), len(latencias) - 1)],
+            'max': latencias[-1],
+        },
+        'pico_memoria_mb': pico / 2 ** 20,
+    }
+
+
+def medir_com_erro(*args, **kwargs):
+    try:
+        return medir(*args, **kwargs)
+    except Exception as e:
+        return {'erro': f'{type(e).__name__}: {e}'}
+
+
+# --- Interações nas páginas (AppTest) ---
+def abrir(pagina):
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(PAGINAS[pagina], default_timeout=TEMPO_LIMITE_PAGINA)
+
+
+def executar(alvo):
+    """Executa a página (ou a interação com um elemento dela) e falha se a página levantar exceção."""
+    app = alvo.run()
+    if app.exception:
+        raise RuntimeError('; '.join(e.message for e in app.exception))
+    return app
+
+
+def widget(elementos, rotulo):
+    for elemento in elementos:
+        if elemento.label == rotulo:
+            return elemento
+    raise LookupError(f'Elemento "{rotulo}" não encontrado na página')
+
+
+def buscar_gerenciar(app, codigo):
+    widget(app.text_input, 'Digite o Código do Item (BMP):').set_value(codigo)
+    executar(widget(app.button, '🔎 Buscar / Iniciar Cadastro').click())
+    if not app.session_state['item_selecionado']:
+        raise RuntimeError(f'Item {codigo} não foi selecionado')
+    return app
+
+
+def buscar_inspecao(app, codigo):
+    widget(app.text_input, 'Código do Item (BMP):').set_value(codigo)
+    executar(widget(app.button, '🔎 Buscar Item').click())
+    if not app.session_state['produto_encontrado']:
+        raise RuntimeError(f'Item {codigo} não foi encontrado')
+    return app
+
+
+def medir_paginas(codigos, repeticoes):
+    import armazenamento
+    import busca
+
+    sorteio = random.Random(7)
+    novos = iter(range(10 ** 9, 2 * 10 ** 9))
+    resultados = {}
+
+    def limpar_caches():
+        armazenamento.limpar_cache()
+        busca._indices.clear()
+
+    for pagina in PAGINAS:
+        resultados[f'{pagina}.abrir_fria'] = medir(
+            lambda app: executar(app), lambda: (limpar_caches(), abrir(pagina))[1], repeticoes
+        )
+        resultados[f'{pagina}.abrir'] = medir(lambda app: executar(app), lambda: abrir(pagina), repeticoes)
+
+    # Gerenciar: buscar e salvar uma atualização
+    resultados['gerenciar.buscar_bmp'] = medir(
+        lambda app: buscar_gerenciar(app, sorteio.choice(codigos)),
+        lambda: executar(abrir('gerenciar')), repeticoes
+    )
+
+    def salvar_gerenciar(app):
+        widget(app.text_input, 'Situação do Item:').set_value(sorteio.choice(['Em uso', 'A reparar']))
+        executar(widget(app.button, '💾 Salvar Item').click())
+
+    resultados['gerenciar.salvar_atualizacao'] = medir(
+        salvar_gerenciar,
+        lambda: buscar_gerenciar(executar(abrir('gerenciar')), sorteio.choice(codigos)), repeticoes
+    )
+
+    # Cadastro: novo item
+    def cadastrar(app):
+        codigo = str(next(novos))
+        widget(app.text_input, 'Código de Barras do Item:').set_value(codigo)
+        widget(app.text_input, 'Nome do Item:').set_value('Cadeira de teste')
+        widget(app.text_input, 'Apartamento:').set_value('Apto 999')
+        executar(widget(app.button, '💾 Cadastrar Item').click())
+        if armazenamento.buscar_item('inventario', codigo) is None:
+            raise RuntimeError(f'Item {codigo} não foi cadastrado')
+
+    resultados['cadastro.cadastrar_item'] = medir(cadastrar, lambda: executar(abrir('cadastro')), repeticoes)
+
+    # Inspeção: buscar e salvar pelo formulário manual
+    resultados['inspecao.buscar_bmp'] = medir(
+        lambda app: buscar_inspecao(app, sorteio.choice(codigos)),
+        lambda: executar(abrir('inspecao')), repeticoes
+    )
+
+    def preparar_inspecao():
+        app = buscar_inspecao(executar(abrir('inspecao')), sorteio.choice(codigos))
+        return executar(widget(app.button, '✍️ Atualizar Manualmente').click())
+
+    def salvar_inspecao(app):
+        widget(app.text_area, 'Comentário de Inspeção:').set_value(f'Inspeção {sorteio.random():.6f}')
+        executar(widget(app.button, 'Salvar Alterações').click())
+
+    resultados['inspecao.salvar_inspecao'] = medir(salvar_inspecao, preparar_inspecao, repeticoes)
+    return resultados
+
+
+def medir_ocr(amostras, repeticoes):
+    """O AppTest não simula a câmera, então o OCR é chamado diretamente com as fotos."""
+    resultados = {}
+    try:
+        import ocr
+    except ImportError as e:
+        erro = {'erro': f'{type(e).__name__}: {e}'}
+        return {'ocr.preprocessar': erro, 'ocr.ler_etiqueta': erro}
+    from PIL import Image
+
+    def preprocessar(_):
+        for _, dados in amostras:
+            ocr.preprocessar_etiqueta(Image.open(io.BytesIO(dados)))
+
+    def ler(_):
+        acertos = sum(ocr.ler_numero_etiqueta(dados) == esperado for esperado, dados in amostras)
+        resultados['ocr.acuracia'] = acertos / len(amostras)
+
+    resultados['ocr.preprocessar'] = medir_com_erro(preprocessar, repeticoes=repeticoes)
+    resultados['ocr.ler_etiqueta'] = medir_com_erro(ler, repeticoes=repeticoes)
+    for chave in ('ocr.preprocessar', 'ocr.ler_etiqueta'):
+        resultados[chave]['amostras'] = len(amostras)
+    return resultados
+
+
+def medir_tamanho(tamanho, repeticoes, fotos=None):
+    """Gera o inventário em uma pasta temporária e mede todas as operações (roda no processo filho)."""
+    os.environ.setdefault('INVENTARIO_IA_BACKEND', 'falso')
+    with tempfile.TemporaryDirectory(prefix='bench_inventario_') as pasta:
+        os.chdir(pasta)
+        inicio = time.perf_counter()
+        codigos = gerar_inventario(tamanho, pasta)
+        resultados = {'gerar_csv': {'latencia_ms': {'p50': (time.perf_counter() - inicio) * 1000}}}
+
+        import armazenamento
+
+        # A primeira conexão cria a tabela e migra os dois CSVs antigos
+        inicio = time.perf_counter()
+        armazenamento.conectar()
+        resultados['migracao_inicial'] = {'latencia_ms': {'p50': (time.perf_counter() - inicio) * 1000}}
+        resultados['migracao'] = medir(lambda _: armazenamento.migrar('inventario'), repeticoes=1)
+        resultados['itens'] = armazenamento.contar_itens('inventario')
+
+        resultados.update(medir_paginas(codigos, repeticoes))
+        amostras = carregar_fotos(fotos) if fotos else gerar_etiquetas(codigos)
+        resultados.update(medir_ocr(amostras, repeticoes))
+        os.chdir(RAIZ)
+    return resultados
+
+
+# --- Execução ---
+def versao_codigo():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tamanhos', nargs='+', type=int, default=TAMANHOS)
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES)
+    parser.add_argument('--fotos', help='Pasta com fotos reais de etiquetas (padrão: etiquetas sintéticas)')
+    parser.add_argument('--saida', help='Arquivo JSON para gravar o resultado')
+    parser.add_argument('--processo-filho', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.processo_filho:
+        resultado = medir_tamanho(args.tamanhos[0], args.repeticoes, args.fotos)
+        print(json.dumps(resultado))
+        return
+
+    relatorio = {
+        'versao': versao_codigo(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'repeticoes': args.repeticoes,
+        'resultados': {},
+    }
+    for tamanho in args.tamanhos:
+        print(f'--- {tamanho} itens ---', file=sys.stderr)
+        comando = [sys.executable, os.path.abspath(__file__), '--processo-filho',
+                   '--tamanhos', str(tamanho), '--repeticoes', str(args.repeticoes)]
+        if args.fotos:
+            comando += ['--fotos', os.path.abspath(args.fotos)]
+        processo = subprocess.run(comando, capture_output=True, text=True)
+        if processo.returncode != 0:
+            relatorio['resultados'][str(tamanho)] = {'erro': processo.stderr.strip().splitlines()[-1:]}
+            print(processo.stderr, file=sys.stderr)
+            continue
+        medidas = json.loads(processo.stdout.strip().splitlines()[-1])
+        relatorio['resultados'][str(tamanho)] = medidas
+        for operacao, valores in medidas.items():
+            if isinstance(valores, dict) and 'latencia_ms' in valores:
+                memoria = valores.get('pico_memoria_mb')
+                print(
+                    f"{operacao:>32}: p50 {valores['latencia_ms']['p50']:9.1f} ms"
+                    + (f" | pico {memoria:8.1f} MB" if memoria is not None else ''),
+                    file=sys.stderr
+                )
+            elif isinstance(valores, dict) and 'erro' in valores:
+                print(f"{operacao:>32}: {valores['erro']}", file=sys.stderr)
+
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == '__main__':
+    main()
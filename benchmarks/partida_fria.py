@@ -0,0 +1,133 @@
+"""
+Benchmark da partida a frio das páginas: primeira execução e primeira interação.
+
+Cada página roda em um processo Python novo (sobre um inventário sintético já
+migrado), para que nenhuma importação venha de uma execução anterior. São
+medidos a primeira execução da página pelo AppTest, a primeira interação
+(busca de um BMP) e quais dependências pesadas (pytesseract, PIL,
+google.genai) já estavam carregadas ao final de cada etapa. Na página
+de inspeção também são medidas a primeira leitura de OCR de uma foto (com a
+carga do motor) e a criação do cliente da IA.
+
+Uso:
+    python benchmarks/partida_fria.py [--itens 10000] [--saida resultado.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(RAIZ))
+
+ITENS = 10_000
+TEMPO_LIMITE_PAGINA = 600
+DEPENDENCIAS_PESADAS = ['pytesseract', 'PIL', 'google.genai']
+PAGINAS = ['gerenciar', 'cadastro', 'inspecao']
+
+
+def carregadas():
+    return [nome for nome in DEPENDENCIAS_PESADAS if nome in sys.modules]
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        funcao()
+    except Exception as e:
+        erro = f'{type(e).__name__}: {e}'
+    return {'ms': (time.perf_counter() - inicio) * 1000, 'erro': erro, 'carregadas': carregadas()}
+
+
+def medir_pagina(pagina, codigo, foto):
+    """Roda no processo filho: todas as importações acontecem aqui dentro."""
+    from streamlit.testing.v1 import AppTest
+    from paginas import PAGINAS as ARQUIVOS, executar, widget, buscar_gerenciar, buscar_inspecao
+
+    os.environ.setdefault('INVENTARIO_IA_BACKEND', 'falso')
+    app = AppTest.from_file(ARQUIVOS[pagina], default_timeout=TEMPO_LIMITE_PAGINA)
+    resultado = {'primeira_execucao': cronometrar(lambda: executar(app))}
+    if pagina == 'gerenciar':
+        resultado['primeira_interacao'] = cronometrar(lambda: buscar_gerenciar(app, codigo))
+    elif pagina == 'inspecao':
+        resultado['primeira_interacao'] = cronometrar(lambda: buscar_inspecao(app, codigo))
+    else:
+        resultado['primeira_interacao'] = cronometrar(
+            lambda: executar(widget(app.text_input, 'Código de Barras do Item:').set_value(codigo))
+        )
+
+    if pagina == 'inspecao':
+        import ia
+        import ocr
+
+        # O que acontece quando a primeira foto é tirada
+        resultado['primeira_leitura_ocr'] = cronometrar(lambda: ocr.solicitar_leitura(foto)[1].result())
+        resultado['segunda_leitura_ocr'] = cronometrar(
+            lambda: ocr.ler_numero_etiqueta(foto + b'\0')
+        )
+        resultado['criar_cliente_ia'] = cronometrar(lambda: ia.BackendGemini().preparar('chave-de-teste'))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--itens', type=int, default=ITENS, help='Tamanho do inventário sintético')
+    parser.add_argument('--saida', help='Arquivo JSON para gravar o resultado')
+    parser.add_argument('--pagina', choices=PAGINAS, help=argparse.SUPPRESS)
+    parser.add_argument('--codigo', help=argparse.SUPPRESS)
+    parser.add_argument('--foto', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.pagina:
+        with open(args.foto, 'rb') as arquivo:
+            foto = arquivo.read()
+        print(json.dumps(medir_pagina(args.pagina, args.codigo, foto)))
+        return
+
+    from paginas import gerar_inventario, gerar_etiquetas, versao_codigo
+
+    relatorio = {'versao': versao_codigo(), 'itens': args.itens, 'resultados': {}}
+    with tempfile.TemporaryDirectory(prefix='bench_partida_') as pasta:
+        codigos = gerar_inventario(args.itens, pasta)
+        codigo, foto = gerar_etiquetas(codigos, quantidade=1)[0]
+        caminho_foto = os.path.join(pasta, 'etiqueta.jpg')
+        with open(caminho_foto, 'wb') as arquivo:
+            arquivo.write(foto)
+        # Migra os CSVs em um processo à parte, para não entrar na medida das páginas
+        subprocess.run(
+            [sys.executable, '-c', 'import armazenamento; armazenamento.conectar()'],
+            cwd=pasta, check=True, env={**os.environ, 'PYTHONPATH': os.path.dirname(RAIZ)}
+        )
+        for pagina in PAGINAS:
+            processo = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--pagina', pagina,
+                 '--codigo', codigo, '--foto', caminho_foto],
+                cwd=pasta, capture_output=True, text=True
+            )
+            if processo.returncode != 0:
+                print(processo.stderr, file=sys.stderr)
+                relatorio['resultados'][pagina] = {'erro': processo.stderr.strip().splitlines()[-1:]}
+                continue
+            medidas = json.loads(processo.stdout.strip().splitlines()[-1])
+            relatorio['resultados'][pagina] = medidas
+            for etapa, valores in medidas.items():
+                print(
+                    f"{pagina:>10} {etapa:>22}: {valores['ms']:8.1f} ms | carregadas: "
+                    f"{', '.join(valores['carregadas']) or '-'}" + (f" | {valores['erro']}" if valores['erro'] else ''),
+                    file=sys.stderr
+                )
+
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+"""
+Pesquisa e filtros sobre o inventário.
+
+Para cada base é mantido, em memória e compartilhado pelo processo:
+- a lista ordenada de códigos, para busca por prefixo do BMP;
+- um índice invertido (palavra -> códigos) das colunas de texto;
+- os conjuntos de códigos por apartamento e por situação (facetas);
+- uma árvore de prefixos (trie) dos códigos, para sugerir os códigos
+  existentes mais próximos de uma leitura errada do OCR.
+
+Os índices são montados na primeira pesquisa por prefixo ou por palavras e
+atualizados item a item a cada escrita feita pelo `armazenamento`. Escritas
+de outros processos (como o `servico`) são aplicadas a partir do registro de
+mudanças do banco, relendo só os itens alterados; a base inteira só é relida
+quando foi substituída. As contagens das facetas vêm dos resumos do banco e
+não dependem dos índices.
+"""
+import re
+import bisect
+import threading
+import unicodedata
+
+import armazenamento
+import metricas
+
+FACETAS = ['apartamento', 'situacao']
+
+
+def normalizar_texto(texto):
+    """Minúsculas e sem acentos, para comparar palavras."""
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def extrair_palavras(texto):
+    return set(re.findall(r'\w+', normalizar_texto(texto)))
+
+
+class TrieCodigos:
+    """Árvore de prefixos dos códigos com busca por distância de edição (Levenshtein)."""
+
+    FIM = None  # chave do nó que marca o fim de um código
+
+    def __init__(self, codigos=()):
+        self.raiz = {}
+        for codigo in codigos:
+            self.adicionar(codigo)
+
+    def adicionar(self, codigo):
+        no = self.raiz
+        for caractere in codigo:
+            no = no.setdefault(caractere, {})
+        no[self.FIM] = codigo
+
+    def contem(self, codigo):
+        no = self.raiz
+        for caractere in codigo:
+            no = no.get(caractere)
+            if no is None:
+                return False
+        return self.FIM in no
+
+    def remover(self, codigo):
+        caminho = [self.raiz]
+        for caractere in codigo:
+            no = caminho[-1].get(caractere)
+            if no is None:
+                return
+            caminho.append(no)
+        caminho[-1].pop(self.FIM, None)
+        # Remove os nós que ficaram vazios, de baixo para cima
+        for profundidade in range(len(codigo), 0, -1):
+            if caminho[profundidade]:
+                break
+            del caminho[profundidade - 1][codigo[profundidade - 1]]
+
+    def proximos(self, codigo, distancia_maxima):
+        """Lista de (distância, código) com distância de edição até `distancia_maxima`."""
+        encontrados = []
+        linha_inicial = list(range(len(codigo) + 1))
+        pilha = [(self.raiz, linha_inicial)]
+        while pilha:
+            no, linha = pilha.pop()
+            for caractere, filho in no.items():
+                if caractere is self.FIM:
+                    continue
+                nova = [linha[0] + 1]
+                for i, esperado in enumerate(codigo, start=1):
+                    nova.append(min(
+                        nova[i - 1] + 1,
+                        linha[i] + 1,
+                        linha[i - 1] + (esperado != caractere),
+                    ))
+                if self.FIM in filho and nova[-1] <= distancia_maxima:
+                    encontrados.append((nova[-1], filho[self.FIM]))
+                # Só desce se algum prefixo ainda pode ficar dentro da distância
+                if min(nova) <= distancia_maxima:
+                    pilha.append((filho, nova))
+        return encontrados
+
+
+class IndiceBusca:
+    """Índices de busca de uma base, construídos a partir do DataFrame em cache."""
+
+    def __init__(self, base):
+        self.base = base
+        self.config = armazenamento.BASES[base]
+        # `trava` protege as estruturas; `trava_atualizacao` garante uma única
+        # construção ou atualização por vez, mesmo com várias sessões consultando
+        self.trava = threading.Lock()
+        self.trava_atualizacao = threading.Lock()
+        self._limpar()
+        self.versao = -1
+
+    def _limpar(self):
+        self.codigos = []
+        self.trie = TrieCodigos()
+        self.palavras = {}
+        self.vocabulario = []
+        self.facetas = {faceta: {} for faceta in FACETAS}
+        # código -> (palavras, valores das facetas) indexados para o item, para removê-lo depois
+        self.registros = {}
+
+    @metricas.medir('busca.construir_indice')
+    def construir(self):
+        versao = armazenamento.versao_base(self.base)
+        df = armazenamento.carregar_dados(self.base)
+        chave = self.config['chave']
+        with self.trava:
+            self._limpar()
+            self.versao = versao
+            self.codigos = sorted(df[chave].tolist())
+            self.trie = TrieCodigos(self.codigos)
+            for item in df.to_dict('records'):
+                self._adicionar(item, ordenar=False)
+            self.vocabulario = sorted(self.palavras)
+
+    @metricas.medir('busca.atualizar_indice')
+    def atualizar(self):
+        """
+        Põe o índice na versão atual da base. Aplica apenas os itens do registro
+        de mudanças do armazenamento; a base inteira só é relida na primeira vez
+        ou quando foi substituída.
+        """
+        with self.trava_atualizacao:
+            atual, codigos = armazenamento.mudancas_desde(self.base, self.versao)
+            if atual == self.versao:
+                return
+            if codigos is None:
+                self.construir()
+                return
+            chave = self.config['chave']
+            itens = {item[chave]: item for item in armazenamento.buscar_registros(self.base, codigos)}
+            with self.trava:
+                for codigo in codigos:
+                    self._substituir(codigo, itens.get(codigo))
+                self.versao = max(self.versao, atual)
+
+    # --- Manutenção incremental ---
+    def _palavras_item(self, item):
+        palavras = set()
+        for col in self.config['colunas_texto']:
+            palavras |= extrair_palavras(item.get(col, ''))
+        return palavras
+
+    def _adicionar(self, item, ordenar=True):
+        codigo = item[self.config['chave']]
+        palavras = self._palavras_item(item)
+        for palavra in palavras:
+            if palavra not in self.palavras:
+                self.palavras[palavra] = set()
+                if ordenar:
+                    bisect.insort(self.vocabulario, palavra)
+            self.palavras[palavra].add(codigo)
+        valores = tuple(item.get(faceta, '') for faceta in FACETAS)
+        for faceta, valor in zip(FACETAS, valores):
+            self.facetas[faceta].setdefault(valor, set()).add(codigo)
+        self.registros[codigo] = (palavras, valores)
+
+    def _remover(self, codigo):
+        palavras, valores = self.registros.pop(codigo)
+        for palavra in palavras:
+            codigos = self.palavras.get(palavra)
+            if codigos is None:
+                continue
+            codigos.discard(codigo)
+            if not codigos:
+                del self.palavras[palavra]
+                posicao = bisect.bisect_left(self.vocabulario, palavra)
+                if posicao < len(self.vocabulario) and self.vocabulario[posicao] == palavra:
+                    del self.vocabulario[posicao]
+        for faceta, valor in zip(FACETAS, valores):
+            codigos = self.facetas[faceta].get(valor)
+            if codigos is not None:
+                codigos.discard(codigo)
+                if not codigos:
+                    del self.facetas[faceta][valor]
+
+    def _substituir(self, codigo, item):
+        """Troca o que o índice tem de `codigo` pelo item atual (None se o item foi apagado)."""
+        existia = codigo in self.registros
+        if existia:
+            self._remover(codigo)
+        if item is None:
+            if existia:
+                posicao = bisect.bisect_left(self.codigos, codigo)
+                if posicao < len(self.codigos) and self.codigos[posicao] == codigo:
+                    del self.codigos[posicao]
+                self.trie.remover(codigo)
+            return
+        if not existia:
+            bisect.insort(self.codigos, codigo)
+            self.trie.adicionar(codigo)
+        self._adicionar(item)
+
+    def aplicar(self, versao, alteracoes):
+        """
+        Aplica as alterações de uma escrita deste processo. Retorna False se o
+        índice não estava na versão imediatamente anterior; nesse caso ele é posto
+        em dia pelo registro de mudanças na próxima consulta (`atualizar`).
+        """
+        chave = self.config['chave']
+        with self.trava:
+            if alteracoes is None or versao != self.versao + 1:
+                return False
+            for antes, depois in alteracoes:
+                self._substituir((depois or antes)[chave], depois)
+            self.versao = versao
+        return True
+
+    # --- Consultas ---
+    def por_prefixo(self, prefixo):
+        """Códigos que começam com `prefixo`, em ordem."""
+        with self.trava:
+            inicio = bisect.bisect_left(self.codigos, prefixo)
+            fim = bisect.bisect_left(self.codigos, prefixo + '\uffff')
+            return self.codigos[inicio:fim]
+
+    def por_palavras(self, texto):
+        """
+        Códigos cujos textos contêm todas as palavras de `texto`.
+        Cada palavra da consulta casa com palavras do índice que começam com ela.
+        """
+        resultado = None
+        with self.trava:
+            for termo in extrair_palavras(texto):
+                inicio = bisect.bisect_left(self.vocabulario, termo)
+                encontrados = set()
+                for palavra in self.vocabulario[inicio:]:
+                    if not palavra.startswith(termo):
+                        break
+                    encontrados |= self.palavras[palavra]
+                resultado = encontrados if resultado is None else resultado & encontrados
+                if not resultado:
+                    return set()
+        return resultado if resultado is not None else set()
+
+    def codigos_proximos(self, codigo, k=5, distancia_maxima=2):
+        """
+        Os `k` códigos existentes mais próximos de `codigo` (menor distância de edição).
+
+        A trie é percorrida com distâncias crescentes (0, 1, ...), e cada percurso
+        poda os ramos além da distância da vez; as distâncias maiores, que visitam
+        muito mais nós, só são percorridas quando as menores não somam `k` códigos.
+        O resultado vem ordenado por distância e depois pelo código.
+        """
+        encontrados = []
+        with self.trava:
+            for distancia in range(distancia_maxima + 1):
+                encontrados = sorted(self.trie.proximos(codigo, distancia))
+                if len(encontrados) >= k:
+                    break
+        return [codigo_proximo for _, codigo_proximo in encontrados[:k]]
+
+    def pesquisar(self, prefixo='', texto='', apartamentos=None, situacoes=None):
+        """Combina os filtros informados e retorna a lista ordenada de códigos encontrados."""
+        conjuntos = []
+        if prefixo:
+            conjuntos.append(set(self.por_prefixo(prefixo)))
+        if texto and texto.strip():
+            conjuntos.append(self.por_palavras(texto))
+        with self.trava:
+            for faceta, valores in (('apartamento', apartamentos), ('situacao', situacoes)):
+                if valores:
+                    conjuntos.append(set().union(*(self.facetas[faceta].get(v, set()) for v in valores)))
+            if not conjuntos:
+                return list(self.codigos)
+        conjuntos.sort(key=len)
+        return sorted(set.intersection(*conjuntos))
+
+
+# --- Índices compartilhados pelo processo ---
+_indices = {}
+_indices_trava = threading.Lock()
+
+
+@metricas.medir('busca.obter_indice')
+def obter_indice(base):
+    """
+    Retorna o índice da base, em dia com as escritas feitas por qualquer processo.
+    Na primeira chamada o índice é construído a partir da base inteira.
+    """
+    with _indices_trava:
+        indice = _indices.get(base)
+        if indice is None:
+            indice = _indices[base] = IndiceBusca(base)
+    if indice.versao != armazenamento.versao_base(base):
+        indice.atualizar()
+    return indice
+
+
+def _ao_escrever(base, versao, alteracoes):
+    indice = _indices.get(base)
+    if indice is not None:
+        # Se não der para aplicar aqui, `atualizar` recupera pelo registro de mudanças
+        indice.aplicar(versao, alteracoes)
+
+
+armazenamento.registrar_observador(_ao_escrever)
+
+
+def contagem_facetas(base):
+    """
+    Quantidade de itens para cada valor de apartamento e situação, a partir do
+    resumo mantido pelo armazenamento (sem montar os índices).
+    """
+    resumo = armazenamento.resumo_situacoes(base)
+    return {
+        faceta: resumo.groupby(faceta)['quantidade'].sum().sort_index().to_dict()
+        for faceta in FACETAS
+    }
+
+
+@metricas.medir('busca.pesquisar')
+def pesquisar(base, prefixo='', texto='', apartamentos=None, situacoes=None, limite=None):
+    """
+    Pesquisa a base. Retorna um DataFrame com os itens encontrados (até `limite`)
+    e o total de itens que atendem aos filtros.
+
+    Os índices só são usados (e montados) quando há prefixo ou palavras; os
+    filtros só de apartamento e situação são consultas ao banco.
+    """
+    if not prefixo and not (texto and texto.strip()):
+        filtros = {'apartamento': apartamentos or None, 'situacao': situacoes or None}
+        total = armazenamento.contar_itens(base, **filtros)
+        tamanho = total if limite is None else min(limite, total)
+        return armazenamento.carregar_pagina(base, 1, tamanho, **filtros), total
+    codigos = obter_indice(base).pesquisar(prefixo, texto, apartamentos, situacoes)
+    total = len(codigos)
+    if limite is not None:
+        codigos = codigos[:limite]
+    return armazenamento.buscar_itens(base, codigos), total
+
+
+def codigos_proximos(base, codigo, k=5, distancia_maxima=2):
+    """Sugestões de códigos existentes parecidos com `codigo` (ex.: leitura do OCR com erro)."""
+    return obter_indice(base).codigos_proximos(str(codigo).strip(), k, distancia_maxima)
@@ -0,0 +1,164 @@
+"""
+Componentes de interface compartilhados pelas páginas do inventário.
+"""
+import os
+import math
+import time
+
+import pandas as pd
+import streamlit as st
+
+import armazenamento
+import busca
+import esquema
+import importacao
+import metricas
+
+TAMANHOS_PAGINA = [25, 50, 100, 250]
+# As datas são datetime64 em memória; na tela aparecem no formato brasileiro
+COLUNAS_DATA = {
+    col: st.column_config.DatetimeColumn(format='DD/MM/YYYY HH:mm:ss') for col in esquema.COLUNAS_DATA
+}
+
+
+def tabela_paginada(base, chave, colunas=None, selecao='multi-row', filtros=None):
+    """
+    Exibe a base em uma tabela paginada com seleção de linhas.
+
+    Apenas a página atual é lida do banco e enviada ao navegador, então o custo
+    de renderização depende do tamanho da página e não do tamanho do inventário.
+    `filtros` (apartamento, situacao, sem_inspecao_dias) restringe os itens
+    exibidos, como em `armazenamento.carregar_pagina`.
+    Retorna um DataFrame com as linhas selecionadas na página atual.
+    """
+    filtros = filtros or {}
+    total = armazenamento.contar_itens(base, **filtros)
+    col_tamanho, col_pagina, col_info = st.columns((1, 1, 3))
+    tamanho_pagina = col_tamanho.selectbox(
+        'Itens por página:', options=TAMANHOS_PAGINA, index=1, key=f'{chave}_tamanho'
+    )
+    total_paginas = max(math.ceil(total / tamanho_pagina), 1)
+    pagina = col_pagina.number_input(
+        'Página:', min_value=1, max_value=total_paginas, value=1, step=1, key=f'{chave}_pagina'
+    )
+    col_info.caption(f'Página {pagina} de {total_paginas} · {total} item(s) no total')
+
+    df_pagina = armazenamento.carregar_pagina(base, pagina, tamanho_pagina, **filtros)
+    if colunas:
+        df_pagina = df_pagina[colunas]
+
+    # A chave inclui a página para que a seleção não passe de uma página para outra
+    evento = st.dataframe(
+        df_pagina,
+        hide_index=True,
+        use_container_width=True,
+        on_select='rerun',
+        selection_mode=selecao,
+        column_config=COLUNAS_DATA,
+        key=f'{chave}_tabela_{pagina}_{tamanho_pagina}',
+    )
+    return df_pagina.iloc[evento.selection.rows]
+
+
+def painel_busca(base, chave, limite=500):
+    """
+    Filtros por prefixo do código, palavras do nome/comentário, apartamento e situação.
+    As contagens das facetas vêm dos resumos do banco; os índices em memória do
+    módulo `busca` só são usados quando há um prefixo ou palavras para pesquisar.
+    """
+    config = armazenamento.BASES[base]
+    facetas = busca.contagem_facetas(base)
+
+    col_codigo, col_texto = st.columns(2)
+    prefixo = col_codigo.text_input('Código começa com:', key=f'{chave}_prefixo')
+    texto = col_texto.text_input('Palavras no nome ou comentário:', key=f'{chave}_texto')
+    col_apto, col_situacao = st.columns(2)
+    apartamentos = col_apto.multiselect(
+        'Apartamento:', options=list(facetas['apartamento']),
+        format_func=lambda valor: f"{valor or '(vazio)'} ({facetas['apartamento'][valor]})",
+        key=f'{chave}_apartamentos'
+    )
+    situacoes = col_situacao.multiselect(
+        'Situação:', options=list(facetas['situacao']),
+        format_func=lambda valor: f"{valor or '(vazio)'} ({facetas['situacao'][valor]})",
+        key=f'{chave}_situacoes'
+    )
+
+    if not any([prefixo, texto.strip(), apartamentos, situacoes]):
+        return
+    resultado, total = busca.pesquisar(
+        base, prefixo=prefixo.strip(), texto=texto,
+        apartamentos=apartamentos, situacoes=situacoes, limite=limite
+    )
+    if total == 0:
+        st.info('Nenhum item encontrado com esses filtros.')
+        return
+    st.caption(f'{total} item(s) encontrados' + (f' · exibindo os primeiros {limite}' if total > limite else ''))
+    st.dataframe(resultado.set_index(config['chave']), use_container_width=True, column_config=COLUNAS_DATA)
+
+
+def painel_importacao(base, chave):
+    """Importação de uma planilha CSV/XLSX inteira e exportação do inventário."""
+    config = armazenamento.BASES[base]
+    st.write(
+        f"A planilha deve ter as colunas: {', '.join(config['colunas'])}. "
+        f"Obrigatórias: {', '.join(config['obrigatorias'])}."
+    )
+    arquivo = st.file_uploader('Planilha (CSV ou XLSX):', type=['csv', 'xlsx'], key=f'{chave}_arquivo')
+    atualizar = st.checkbox('Atualizar itens já cadastrados com os dados da planilha', key=f'{chave}_atualizar')
+    if st.button('📥 Validar e Importar', disabled=arquivo is None, key=f'{chave}_importar'):
+        with st.spinner('Validando e importando a planilha...'):
+            gravados, erros = importacao.importar(base, arquivo, arquivo.name, atualizar=atualizar)
+        if gravados:
+            st.success(f'✅ {gravados} item(s) importados com sucesso!')
+        if not erros.empty:
+            st.error(f"❌ {erros['linha'].nunique()} linha(s) com erro não foram importadas.")
+            st.dataframe(erros.head(1000), hide_index=True, use_container_width=True)
+        elif not gravados:
+            st.info('Nenhuma linha nova para importar.')
+
+    st.divider()
+    formato = st.radio('Formato da exportação:', ['csv', 'xlsx'], horizontal=True, key=f'{chave}_formato')
+    if st.button('📤 Preparar Exportação', key=f'{chave}_preparar'):
+        with st.spinner('Gerando arquivo...'):
+            st.session_state[f'{chave}_exportacao'] = (formato, importacao.exportar_para_memoria(base, formato))
+    if f'{chave}_exportacao' in st.session_state:
+        formato_gerado, dados = st.session_state[f'{chave}_exportacao']
+        st.download_button(
+            '⬇️ Baixar Inventário', data=dados, file_name=f'{config["tabela"]}.{formato_gerado}',
+            key=f'{chave}_baixar'
+        )
+
+
+def iniciar_execucao():
+    """Marca o início da execução da página, para medir o tempo de cada re-execução."""
+    if metricas.ativo():
+        st.session_state['_inicio_execucao'] = time.perf_counter()
+
+
+def painel_desempenho(pagina):
+    """
+    Registra o tempo da execução da página (desde `iniciar_execucao`) e, com
+    ?debug=1 na URL ou INVENTARIO_DEBUG=1, mostra os percentis na barra lateral.
+    Deve ser chamado no final da página.
+    """
+    inicio = st.session_state.pop('_inicio_execucao', None)
+    if inicio is not None and metricas.ativo():
+        metricas.registrar(f'execucao.{pagina}', (time.perf_counter() - inicio) * 1000)
+    if st.query_params.get('debug') != '1' and os.environ.get('INVENTARIO_DEBUG') != '1':
+        return
+
+    with st.sidebar.expander('⏱️ Desempenho', expanded=True):
+        ligado = st.toggle('Medir tempos', value=metricas.ativo(), key='_metricas_ligado')
+        if ligado != metricas.ativo():
+            metricas.ativar(ligado)
+            st.rerun()
+        linhas = metricas.resumo()
+        if linhas:
+            st.dataframe(pd.DataFrame(linhas).set_index('operacao').round(1), use_container_width=True)
+        else:
+            st.caption('Nenhuma medida ainda.')
+        st.caption(f'Cada medida também é gravada em {metricas.ARQUIVO_LOG}.')
+        if st.button('Limpar medidas', key='_metricas_limpar'):
+            metricas.limpar()
+            st.rerun()
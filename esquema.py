@@ -0,0 +1,98 @@
+"""
+Esquema único do inventário, compartilhado por todas as páginas.
+
+Os dois arquivos antigos usavam nomes de colunas diferentes
+('Inventario-H8 - itens.csv' com BMP/Itens e 'inventario_geral_h8.csv' com
+codigo_barras/nome_item) e datas como texto "%d/%m/%Y %H:%M:%S". Aqui ficam
+as colunas unificadas, os tipos usados em memória (categorias, datas reais,
+texto) e a conversão/mesclagem dos arquivos antigos.
+
+No banco as datas são gravadas como texto ISO ("%Y-%m-%d %H:%M:%S"), que
+ordena corretamente também nas consultas SQL.
+"""
+from datetime import datetime
+
+import pandas as pd
+
+CHAVE = 'BMP'
+COLUNAS = ['BMP', 'Itens', 'apartamento', 'situacao', 'data_cadastro', 'data_atualizacao', 'ultimo_comentario']
+COLUNAS_DATA = ['data_cadastro', 'data_atualizacao']
+COLUNAS_CATEGORIA = ['apartamento', 'situacao']
+
+OPCOES_SITUACAO = [
+    'Em uso', 'Bem cedido', 'Est. distrib.', 'Aguard. confirmação', 'A alienar',
+    'Est. interno', 'Em reparo', 'A reparar', 'Em trânsito'
+]
+
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+FORMATO_DATA_LEGADO = '%d/%m/%Y %H:%M:%S'
+
+# Nomes antigos das colunas -> nomes unificados
+RENOMEAR_LEGADO = {'codigo_barras': 'BMP', 'nome_item': 'Itens'}
+# Fontes antigas: tabela do banco (versões com uma base por arquivo) -> arquivo CSV correspondente
+FONTES_LEGADAS = {
+    'itens': 'Inventario-H8 - itens.csv',
+    'inventario_geral': 'inventario_geral_h8.csv',
+}
+
+
+def agora():
+    """Data e hora atuais no formato gravado no banco."""
+    return datetime.now().strftime(FORMATO_DATA)
+
+
+def converter_datas(serie):
+    """Converte texto nos formatos antigo (dia/mês/ano) ou ISO em datetime64 (NaT se vazio/inválido)."""
+    serie = pd.Series(serie, dtype='string')
+    legado = pd.to_datetime(serie, format=FORMATO_DATA_LEGADO, errors='coerce')
+    iso = pd.to_datetime(serie, format='ISO8601', errors='coerce')
+    return legado.fillna(iso)
+
+
+def padronizar(df):
+    """
+    Recebe um DataFrame em qualquer um dos esquemas antigos (ou no unificado) e
+    retorna um DataFrame de texto com as COLUNAS unificadas e datas em texto ISO.
+    """
+    df = df.rename(columns=RENOMEAR_LEGADO)
+    for col in COLUNAS:
+        if col not in df.columns:
+            df[col] = ''
+    df = df[COLUNAS].astype('string').fillna('').astype(str).apply(lambda coluna: coluna.str.strip())
+    for col in COLUNAS_DATA:
+        df[col] = converter_datas(df[col]).dt.strftime(FORMATO_DATA).fillna('').astype(str)
+    return df
+
+
+def aplicar_tipos(df):
+    """
+    Converte o DataFrame de texto vindo do banco para os tipos usados em memória:
+    códigos e textos como string, apartamento e situação como categorias e datas como datetime64.
+    """
+    tipado = pd.DataFrame(index=df.index)
+    for col in COLUNAS:
+        if col in COLUNAS_DATA:
+            tipado[col] = pd.to_datetime(df[col].replace('', None), format=FORMATO_DATA, errors='coerce').astype('datetime64[ns]')
+        elif col in COLUNAS_CATEGORIA:
+            tipado[col] = df[col].astype('category')
+        else:
+            tipado[col] = df[col].astype('string')
+    return tipado
+
+
+def unificar(*dfs):
+    """
+    Mescla DataFrames (já padronizados) que podem repetir o mesmo BMP.
+    Para cada código vale o registro atualizado mais recentemente; campos vazios
+    nele são completados com os dos outros registros. Sem nenhuma linha nas
+    fontes (instalação nova, sem os arquivos antigos) retorna a base vazia.
+    """
+    dfs = [df for df in dfs if not df.empty]
+    juntos = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+    if juntos.empty:
+        return padronizar(pd.DataFrame(columns=COLUNAS))
+    juntos = juntos[juntos[CHAVE] != '']
+    ordem = converter_datas(juntos['data_atualizacao']).fillna(converter_datas(juntos['data_cadastro']))
+    juntos = juntos.assign(_ordem=ordem).sort_values('_ordem', ascending=False, na_position='last', kind='stable')
+    mesclado = juntos[COLUNAS].replace('', None).groupby(CHAVE, sort=False).first().reset_index()
+    return mesclado[COLUNAS].fillna('')
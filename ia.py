@@ -0,0 +1,173 @@
+"""
+Cliente de análise de imagens por IA (Google Gemini), compartilhado pelo processo.
+
+- O cliente é criado uma única vez por chave de API (sem configuração global do SDK).
+- A imagem é reduzida e re-codificada em JPEG antes do envio.
+- Cada chamada tem tempo limite e novas tentativas com espera crescente.
+- As respostas ficam em cache (LRU) pelo hash da imagem enviada + prompt.
+
+O SDK do Gemini e o PIL só são importados na primeira análise (ou em
+`aquecer`, chamado pela página assim que a primeira foto é tirada).
+
+O backend é substituível: com INVENTARIO_IA_BACKEND=falso (ou chamando
+`definir_backend(BackendFalso())`) nenhuma chamada de rede é feita.
+"""
+import io
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import metricas
+
+NOME_MODELO = 'gemini-1.5-flash'
+LADO_MAXIMO = 1024
+QUALIDADE_JPEG = 85
+TEMPO_LIMITE = 30
+TENTATIVAS = 3
+ESPERA_INICIAL = 1.0
+TAMANHO_CACHE = 256
+
+PROMPT_ESTADO_CONSERVACAO = (
+    "Descreva o estado de conservação do objeto principal nesta imagem. "
+    "Foque em detalhes como arranhões, amassados, manchas, rasgos ou qualquer outro defeito visível. "
+    "Se o objeto parecer estar em bom estado, mencione isso também."
+)
+
+
+# --- Backends ---
+class BackendGemini:
+    """Envia a imagem para a API do Google Gemini."""
+
+    def __init__(self, nome_modelo=NOME_MODELO):
+        self.nome_modelo = nome_modelo
+        self._clientes = {}
+        self._trava = threading.Lock()
+
+    def preparar(self, api_key):
+        """
+        Importa o SDK e cria o cliente da chave (uma única vez por processo).
+        Cada chave tem o seu `genai.Client`, então sessões com chaves diferentes
+        nunca usam a chave uma da outra.
+        """
+        with self._trava:
+            cliente = self._clientes.get(api_key)
+            if cliente is None:
+                from google import genai
+                cliente = self._clientes[api_key] = genai.Client(api_key=api_key)
+            return cliente
+
+    def gerar(self, api_key, prompt, imagem_jpeg, tempo_limite):
+        from google.genai import types
+
+        cliente = self.preparar(api_key)
+        response = cliente.models.generate_content(
+            model=self.nome_modelo,
+            contents=[prompt, types.Part.from_bytes(data=imagem_jpeg, mime_type='image/jpeg')],
+            config=types.GenerateContentConfig(http_options=types.HttpOptions(timeout=int(tempo_limite * 1000))),
+        )
+        return response.text
+
+
+class BackendFalso:
+    """Backend local para testes: responde sem acessar a rede, de forma determinística."""
+
+    def __init__(self, resposta=None, atraso=0.0):
+        self.resposta = resposta
+        self.atraso = atraso
+        self.chamadas = 0
+
+    def gerar(self, api_key, prompt, imagem_jpeg, tempo_limite):
+        self.chamadas += 1
+        if self.atraso:
+            time.sleep(self.atraso)
+        if self.resposta is not None:
+            return self.resposta
+        return f"[análise simulada] imagem {hashlib.sha256(imagem_jpeg).hexdigest()[:12]}, {len(imagem_jpeg)} bytes."
+
+
+_backend = BackendFalso() if os.environ.get('INVENTARIO_IA_BACKEND') == 'falso' else BackendGemini()
+_respostas = OrderedDict()  # (hash da imagem, prompt) -> texto
+_trava_cache = threading.Lock()
+_aquecidas = set()  # chaves de API cujo cliente já foi (ou está sendo) preparado
+
+
+def definir_backend(backend):
+    """Troca o backend usado pelas análises e limpa o cache de respostas."""
+    global _backend
+    _backend = backend
+    limpar_cache()
+
+
+def limpar_cache():
+    with _trava_cache:
+        _respostas.clear()
+
+
+def aquecer(api_key):
+    """
+    Prepara em segundo plano o cliente da IA para a chave (importação do SDK e
+    criação do cliente), para que a primeira análise não espere por isso.
+    """
+    preparar = getattr(_backend, 'preparar', None)
+    with _trava_cache:
+        if not api_key or preparar is None or api_key in _aquecidas:
+            return
+        _aquecidas.add(api_key)
+
+    def _preparar():
+        try:
+            preparar(api_key)
+        except Exception:
+            # O erro reaparece (e é tratado) na análise propriamente dita
+            with _trava_cache:
+                _aquecidas.discard(api_key)
+
+    threading.Thread(target=_preparar, name='ia-aquecer', daemon=True).start()
+
+
+# --- Preparação da imagem ---
+def preparar_imagem(imagem):
+    """Reduz a imagem (PIL ou bytes) para no máximo LADO_MAXIMO pixels e re-codifica em JPEG."""
+    from PIL import Image
+
+    if isinstance(imagem, (bytes, bytearray)):
+        imagem = Image.open(io.BytesIO(imagem))
+    imagem = imagem.convert('RGB')
+    imagem.thumbnail((LADO_MAXIMO, LADO_MAXIMO))
+    saida = io.BytesIO()
+    imagem.save(saida, format='JPEG', quality=QUALIDADE_JPEG, optimize=True)
+    return saida.getvalue()
+
+
+# --- Análise ---
+@metricas.medir('ia.analisar_imagem')
+def analisar_imagem(api_key, imagem, prompt):
+    """
+    Retorna o texto da análise da imagem pela IA.
+    Levanta a exceção da última tentativa se todas falharem.
+    """
+    imagem_jpeg = preparar_imagem(imagem)
+    chave = (hashlib.sha256(imagem_jpeg).hexdigest(), prompt)
+    with _trava_cache:
+        if chave in _respostas:
+            _respostas.move_to_end(chave)
+            return _respostas[chave]
+
+    espera = ESPERA_INICIAL
+    for tentativa in range(1, TENTATIVAS + 1):
+        try:
+            texto = _backend.gerar(api_key, prompt, imagem_jpeg, TEMPO_LIMITE)
+            break
+        except Exception:
+            if tentativa == TENTATIVAS:
+                raise
+            time.sleep(espera)
+            espera *= 2
+
+    with _trava_cache:
+        _respostas[chave] = texto
+        while len(_respostas) > TAMANHO_CACHE:
+            _respostas.popitem(last=False)
+    return texto
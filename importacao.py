@@ -0,0 +1,194 @@
+"""
+Importação e exportação em massa do inventário (CSV e XLSX).
+
+A planilha é lida em blocos e validada com operações vetorizadas do pandas
+(campos obrigatórios, situação permitida, códigos repetidos no arquivo ou já
+cadastrados). As linhas válidas são gravadas de uma vez, em uma transação.
+
+Uso pela linha de comando:
+    python importacao.py importar inventario planilha.xlsx [--atualizar]
+    python importacao.py exportar inventario inventario.csv
+"""
+import io
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import armazenamento
+import esquema
+
+TAMANHO_BLOCO = 5000
+MOTIVOS = {
+    'obrigatorio': 'Campo obrigatório vazio: {}',
+    'situacao': 'Situação fora da lista permitida',
+    'repetido_arquivo': 'Código repetido no arquivo',
+    'ja_cadastrado': 'Código já cadastrado no inventário',
+}
+
+
+# --- Leitura ---
+def ler_em_blocos(arquivo, nome_arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """Lê um CSV ou XLSX (caminho ou arquivo aberto) e gera DataFrames de texto com até `tamanho_bloco` linhas."""
+    if nome_arquivo.lower().endswith('.xlsx'):
+        yield from _ler_xlsx_em_blocos(arquivo, tamanho_bloco)
+    else:
+        yield from pd.read_csv(
+            arquivo, dtype=str, keep_default_na=False, chunksize=tamanho_bloco,
+            sep=_detectar_separador(arquivo), encoding='utf-8-sig'
+        )
+
+
+def _detectar_separador(arquivo):
+    """Planilhas salvas pelo Excel em português costumam usar ';' em vez de ','."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as aberto:
+            inicio = aberto.readline()
+    else:
+        posicao = arquivo.tell()
+        inicio = arquivo.readline()
+        arquivo.seek(posicao)
+    if isinstance(inicio, str):
+        inicio = inicio.encode('utf-8')
+    return ';' if inicio.count(b';') > inicio.count(b',') else ','
+
+
+def _ler_xlsx_em_blocos(arquivo, tamanho_bloco):
+    from openpyxl import load_workbook
+
+    planilha = load_workbook(arquivo, read_only=True, data_only=True).active
+    linhas = planilha.iter_rows(values_only=True)
+    cabecalho = [str(c).strip() if c is not None else '' for c in next(linhas, [])]
+    bloco = []
+    for linha in linhas:
+        bloco.append(['' if valor is None else str(valor) for valor in linha])
+        if len(bloco) == tamanho_bloco:
+            yield pd.DataFrame(bloco, columns=cabecalho)
+            bloco = []
+    if bloco:
+        yield pd.DataFrame(bloco, columns=cabecalho)
+
+
+# --- Validação ---
+def validar_bloco(df, base, codigos_vistos, codigos_existentes, atualizar=False, inicio=0):
+    """
+    Valida um bloco e retorna (linhas válidas, erros).
+    `codigos_vistos` acumula os códigos dos blocos anteriores (repetidos no arquivo);
+    `erros` tem as colunas linha, codigo e motivo.
+    """
+    config = armazenamento.BASES[base]
+    chave = config['chave']
+    df = esquema.padronizar(df)
+    # Linha da planilha (contando o cabeçalho), para o usuário localizar o erro
+    df.index = pd.RangeIndex(inicio + 2, inicio + 2 + len(df))
+
+    problemas = []
+    for col in config['obrigatorias']:
+        problemas.append((df[col] == '', MOTIVOS['obrigatorio'].format(col)))
+    problemas.append(((df['situacao'] != '') & ~df['situacao'].isin(esquema.OPCOES_SITUACAO), MOTIVOS['situacao']))
+    com_codigo = df[chave] != ''
+    repetidos = com_codigo & (df[chave].isin(codigos_vistos) | df[chave].duplicated(keep='first'))
+    problemas.append((repetidos, MOTIVOS['repetido_arquivo']))
+    if not atualizar:
+        problemas.append((df[chave].isin(codigos_existentes), MOTIVOS['ja_cadastrado']))
+
+    partes = [
+        pd.DataFrame({'linha': df.index[mascara], 'codigo': df.loc[mascara, chave].to_numpy(), 'motivo': motivo})
+        for mascara, motivo in problemas if mascara.any()
+    ]
+    erros = (
+        pd.concat(partes, ignore_index=True).sort_values('linha', kind='stable', ignore_index=True)
+        if partes else pd.DataFrame(columns=['linha', 'codigo', 'motivo'])
+    )
+    invalidas = np.logical_or.reduce([mascara.to_numpy() for mascara, _ in problemas])
+    codigos_vistos.update(df.loc[com_codigo, chave])
+    return df[~invalidas], erros
+
+
+def importar(base, arquivo, nome_arquivo, atualizar=False, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Valida o arquivo inteiro e, se houver linhas válidas, grava todas em uma única escrita.
+    Com `atualizar`, os itens já cadastrados só mudam nas colunas que existem na planilha.
+    Retorna (quantidade gravada, DataFrame de erros).
+    """
+    config = armazenamento.BASES[base]
+    codigos_existentes = set(armazenamento.carregar_dados(base)[config['chave']])
+    codigos_vistos = set()
+    validos, erros = [], []
+    colunas_planilha = set()
+    inicio = 0
+    for bloco in ler_em_blocos(arquivo, nome_arquivo, tamanho_bloco):
+        colunas_planilha.update(bloco.rename(columns=esquema.RENOMEAR_LEGADO).columns)
+        bloco_valido, bloco_erros = validar_bloco(
+            bloco, base, codigos_vistos, codigos_existentes, atualizar, inicio
+        )
+        validos.append(bloco_valido)
+        erros.append(bloco_erros)
+        inicio += len(bloco)
+    erros = pd.concat(erros, ignore_index=True) if erros else pd.DataFrame(columns=['linha', 'codigo', 'motivo'])
+    if not validos:
+        return 0, erros
+    gravados = armazenamento.importar_itens(
+        base, pd.concat(validos, ignore_index=True), atualizar=atualizar, colunas=colunas_planilha
+    )
+    return gravados, erros
+
+
+# --- Exportação ---
+def exportar_xlsx(base, arquivo):
+    """Escreve a base em XLSX no modo de escrita contínua do openpyxl (linha a linha)."""
+    from openpyxl import Workbook
+
+    pasta = Workbook(write_only=True)
+    planilha = pasta.create_sheet('inventario')
+    planilha.append(armazenamento.BASES[base]['colunas'])
+    for bloco in armazenamento.iterar_linhas(base):
+        for linha in bloco:
+            planilha.append(linha)
+    pasta.save(arquivo)
+
+
+def exportar_para_memoria(base, formato='csv'):
+    """Exporta a base para um buffer em memória (para o botão de download), sem montar um DataFrame."""
+    saida = io.BytesIO()
+    if formato == 'xlsx':
+        exportar_xlsx(base, saida)
+    else:
+        texto = io.TextIOWrapper(saida, encoding='utf-8-sig', newline='')
+        armazenamento.escrever_csv(base, texto)
+        texto.flush()
+        texto.detach()
+    saida.seek(0)
+    return saida
+
+
+def exportar(base, destino):
+    """Exporta a base para um arquivo .csv ou .xlsx."""
+    if destino.lower().endswith('.xlsx'):
+        exportar_xlsx(base, destino)
+    else:
+        with open(destino, 'w', newline='', encoding='utf-8') as arquivo:
+            armazenamento.escrever_csv(base, arquivo)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importação e exportação em massa do inventário.')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    parser_importar = subparsers.add_parser('importar', help='Importa um arquivo CSV ou XLSX')
+    parser_importar.add_argument('base', choices=sorted(armazenamento.BASES))
+    parser_importar.add_argument('arquivo')
+    parser_importar.add_argument('--atualizar', action='store_true', help='Atualiza os códigos já cadastrados')
+    parser_exportar = subparsers.add_parser('exportar', help='Exporta a base para CSV ou XLSX')
+    parser_exportar.add_argument('base', choices=sorted(armazenamento.BASES))
+    parser_exportar.add_argument('destino')
+    args = parser.parse_args()
+
+    if args.comando == 'importar':
+        gravados, erros = importar(args.base, args.arquivo, os.path.basename(args.arquivo), args.atualizar)
+        print(f'{gravados} item(s) gravados; {erros["linha"].nunique()} linha(s) com erro.')
+        if not erros.empty:
+            print(erros.to_string(index=False, max_rows=50))
+    else:
+        exportar(args.base, args.destino)
+        print(f'Base "{args.base}" exportada para {args.destino}.')
@@ -0,0 +1,40 @@
+"""
+Processamento em segundo plano da inspeção em lote.
+
+Cada par de fotos (etiqueta + item) vira uma tarefa que lê o BMP por OCR e
+pede a análise do estado de conservação à IA. As tarefas rodam em paralelo,
+limitadas a LIMITE_CONCORRENCIA por processo.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import ia
+import ocr
+
+LIMITE_CONCORRENCIA = 4
+
+_executor = ThreadPoolExecutor(max_workers=LIMITE_CONCORRENCIA, thread_name_prefix='lote')
+
+
+def _processar(dados_etiqueta, dados_item, api_key):
+    # O OCR roda no grupo do próprio módulo `ocr` enquanto esta thread espera a IA
+    _, leitura = ocr.solicitar_leitura(dados_etiqueta)
+    resultado = {'BMP': '', 'comentario': '', 'erros': []}
+    if api_key:
+        try:
+            resultado['comentario'] = ia.analisar_imagem(api_key, dados_item, ia.PROMPT_ESTADO_CONSERVACAO)
+        except Exception as e:
+            resultado['erros'].append(f'IA: {e}')
+    try:
+        resultado['BMP'] = leitura.result()
+    except Exception as e:
+        resultado['erros'].append(f'OCR: {e}')
+    return resultado
+
+
+def enviar(dados_etiqueta, dados_item, api_key=None):
+    """
+    Agenda o processamento de um par de fotos e retorna um Future com
+    {'BMP': número lido, 'comentario': análise da IA, 'erros': [...]}.
+    Sem chave de API, apenas o OCR é feito.
+    """
+    return _executor.submit(_processar, dados_etiqueta, dados_item, api_key)
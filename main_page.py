@@ -1,7 +1,8 @@
 import streamlit as st
-import pandas as pd
-import os
-from datetime import datetime
+
+import armazenamento
+import componentes
+import esquema
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -9,26 +10,10 @@ st.set_page_config(
     page_icon="📝",
     layout="wide"
 )
+componentes.iniciar_execucao()
 
 # --- CONFIGURAÇÕES GERAIS ---
-NOME_ARQUIVO_DADOS = 'Inventario-H8 - itens.csv'
-COLUNAS = ['BMP', 'Itens', 'apartamento', 'situacao', 'data_atualizacao', 'ultimo_comentario']
-
-# --- FUNÇÕES AUXILIARES ---
-def carregar_dados():
-    """Carrega os dados do arquivo de inventário e garante que todas as colunas existam."""
-    if os.path.exists(NOME_ARQUIVO_DADOS):
-        df = pd.read_csv(NOME_ARQUIVO_DADOS, dtype={'BMP': str})
-        for col in COLUNAS:
-            if col not in df.columns:
-                df[col] = ''
-    else:
-        df = pd.DataFrame(columns=COLUNAS)
-    return df
-
-def salvar_dados(df):
-    """Salva o DataFrame no arquivo de inventário único."""
-    df.to_csv(NOME_ARQUIVO_DADOS, index=False)
+BASE = 'inventario'
 
 # --- Inicialização do Session State ---
 if 'item_selecionado' not in st.session_state:
@@ -46,10 +31,9 @@ with st.form(key='search_form'):
     buscar_btn = st.form_submit_button('🔎 Buscar / Iniciar Cadastro')
 
     if buscar_btn and codigo_para_buscar:
-        df = carregar_dados()
-        item_existente = df[df['BMP'] == codigo_para_buscar]
-        if not item_existente.empty:
-            st.session_state.item_selecionado = item_existente.iloc[0].to_dict()
+        item_existente = armazenamento.buscar_item(BASE, codigo_para_buscar)
+        if item_existente:
+            st.session_state.item_selecionado = item_existente
         else:
             st.session_state.item_selecionado = {'BMP': codigo_para_buscar, 'Itens': '', 'apartamento': '', 'situacao': ''}
         st.rerun()
@@ -74,59 +58,59 @@ if st.session_state.item_selecionado:
             if not all([nome_item, apartamento, situacao]):
                 st.error('❌ ERRO: Os campos Nome, Apartamento e Situação são obrigatórios!')
             else:
-                df = carregar_dados()
-                data_atual = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-                
-                if item['BMP'] in df['BMP'].values:
-                    # Atualiza o item existente
-                    index = df.index[df['BMP'] == item['BMP']][0]
-                    df.loc[index, 'Itens'] = nome_item
-                    df.loc[index, 'apartamento'] = apartamento
-                    df.loc[index, 'situacao'] = situacao
-                    df.loc[index, 'data_atualizacao'] = data_atual
-                    df.loc[index, 'ultimo_comentario'] = comentario
+                data_atual = esquema.agora()
+                ja_existe = armazenamento.buscar_item(BASE, item['BMP']) is not None
+
+                # Insere ou atualiza apenas este item, sem reescrever o inventário
+                dados_item = {
+                    'BMP': item['BMP'], 'Itens': nome_item, 'apartamento': apartamento,
+                    'situacao': situacao, 'data_atualizacao': data_atual,
+                    'ultimo_comentario': comentario
+                }
+                if not ja_existe:
+                    dados_item['data_cadastro'] = data_atual
+                armazenamento.salvar_item(BASE, dados_item)
+                if ja_existe:
                     st.success(f'✅ SUCESSO: Item "{nome_item}" (BMP: {item["BMP"]}) foi atualizado!')
                 else:
-                    # Adiciona o novo item
-                    novo_item = pd.DataFrame([{
-                        'BMP': item['BMP'], 'Itens': nome_item, 'apartamento': apartamento,
-                        'situacao': situacao, 'data_atualizacao': data_atual,
-                        'ultimo_comentario': comentario
-                    }])
-                    df = pd.concat([df, novo_item], ignore_index=True)
                     st.success(f'✅ SUCESSO: Item "{nome_item}" (BMP: {item["BMP"]}) foi cadastrado!')
 
-                salvar_dados(df)
                 st.session_state.item_selecionado = None
                 st.rerun()
 
+# --- PESQUISA NO INVENTÁRIO ---
+with st.expander("🔍 Pesquisar e Filtrar o Inventário"):
+    componentes.painel_busca(BASE, chave='pesquisa')
+
+# --- IMPORTAÇÃO E EXPORTAÇÃO EM MASSA ---
+with st.expander("📦 Importar / Exportar Planilha"):
+    componentes.painel_importacao(BASE, chave='planilha')
+
 # --- EXIBIÇÃO E EXCLUSÃO DO INVENTÁRIO ---
 st.header('📋 Inventário Completo')
-df_para_exibir = carregar_dados()
 
-if df_para_exibir.empty:
+if armazenamento.contar_itens(BASE) == 0:
     st.info('Ainda não há itens no inventário.')
 else:
     colunas_visiveis = ['BMP', 'Itens', 'apartamento', 'situacao', 'data_atualizacao', 'ultimo_comentario']
-    st.dataframe(df_para_exibir[colunas_visiveis], use_container_width=True)
+    st.write("Para apagar, marque os itens na tabela e use a opção abaixo.")
+    selecionados = componentes.tabela_paginada(BASE, chave='inventario', colunas=colunas_visiveis)
 
     with st.expander("🗑️ Apagar Itens do Inventário"):
-        with st.form(key='delete_form'):
-            st.write("Marque os itens que deseja apagar e clique no botão abaixo.")
-            indices_para_apagar = []
-            for index, row in df_para_exibir.iterrows():
-                label = f"**{row['Itens']}** (Cód: {row['BMP']}, Apto: {row.get('apartamento', 'N/A')}, Situação: {row.get('situacao', 'N/A')})"
-                if st.checkbox(label, key=f"delete_{row['BMP']}_{index}"):
-                    indices_para_apagar.append(index)
-            
-            st.warning('ATENÇÃO: A exclusão é permanente!', icon="⚠️")
-            botao_apagar = st.form_submit_button('Apagar Itens Selecionados')
-
-            if botao_apagar:
-                if not indices_para_apagar:
-                    st.warning('Nenhum item foi selecionado para exclusão.')
-                else:
-                    df_filtrado = df_para_exibir.drop(indices_para_apagar)
-                    salvar_dados(df_filtrado)
-                    st.success(f'{len(indices_para_apagar)} item(s) foram apagados com sucesso!')
-                    st.rerun()
+        codigos_para_apagar = selecionados['BMP'].tolist()
+        if codigos_para_apagar:
+            st.write(f"Itens selecionados: {', '.join(codigos_para_apagar)}")
+
+        st.warning('ATENÇÃO: A exclusão é permanente!', icon="⚠️")
+        botao_apagar = st.button('Apagar Itens Selecionados')
+
+        if botao_apagar:
+            if not codigos_para_apagar:
+                st.warning('Nenhum item foi selecionado para exclusão.')
+            else:
+                armazenamento.apagar_itens(BASE, codigos_para_apagar)
+                st.success(f'{len(codigos_para_apagar)} item(s) foram apagados com sucesso!')
+                st.rerun()
+
+# --- Desempenho (depuração) ---
+componentes.painel_desempenho('gerenciar')
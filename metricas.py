@@ -0,0 +1,148 @@
+"""
+Medição de latência das operações do inventário (carga, gravação, OCR, IA e re-execuções).
+
+As funções marcadas com `@medir('nome')` registram a duração de cada chamada
+quando a medição está ligada (INVENTARIO_METRICAS=1 ou `ativar()`); desligada,
+o custo é apenas o teste de um booleano. As últimas AMOSTRAS_POR_OPERACAO
+durações de cada operação ficam em memória para os percentis do painel de
+depuração, e cada medida é gravada em um log JSON-lines com rotação
+(ARQUIVO_LOG), para análise posterior.
+"""
+import os
+import json
+import time
+import logging
+import threading
+import functools
+import contextlib
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+
+ARQUIVO_LOG = 'metricas_inventario.jsonl'
+TAMANHO_MAXIMO_LOG = 5 * 2 ** 20
+ARQUIVOS_ANTIGOS_LOG = 3
+AMOSTRAS_POR_OPERACAO = 1000
+PERCENTIS = [50, 90, 95, 99]
+
+_ativo = os.environ.get('INVENTARIO_METRICAS') == '1'
+_amostras = {}  # operação -> deque com as últimas durações (ms)
+_contagens = {}  # operação -> total de medidas desde o início
+_trava = threading.Lock()
+_trava_log = threading.Lock()
+_log = None
+
+
+# --- Liga/desliga ---
+def ativo():
+    return _ativo
+
+
+def ativar(ligado=True):
+    """Liga ou desliga a medição para todo o processo."""
+    global _ativo
+    if ligado:
+        _configurar_log()
+    _ativo = ligado
+
+
+def _configurar_log():
+    global _log
+    with _trava_log:
+        if _log is not None:
+            return
+        log = logging.getLogger('inventario.metricas')
+        log.setLevel(logging.INFO)
+        log.propagate = False
+        manipulador = RotatingFileHandler(
+            ARQUIVO_LOG, maxBytes=TAMANHO_MAXIMO_LOG, backupCount=ARQUIVOS_ANTIGOS_LOG, encoding='utf-8'
+        )
+        manipulador.setFormatter(logging.Formatter('%(message)s'))
+        log.addHandler(manipulador)
+        _log = log
+
+
+# --- Registro ---
+def registrar(operacao, duracao_ms, erro=None):
+    """Guarda a duração de uma execução da operação e a grava no log."""
+    with _trava:
+        if operacao not in _amostras:
+            _amostras[operacao] = deque(maxlen=AMOSTRAS_POR_OPERACAO)
+            _contagens[operacao] = 0
+        _amostras[operacao].append(duracao_ms)
+        _contagens[operacao] += 1
+    if _log is None:
+        _configurar_log()
+    _log.info(json.dumps({
+        'momento': datetime.now().isoformat(timespec='milliseconds'),
+        'operacao': operacao,
+        'ms': round(duracao_ms, 3),
+        'erro': erro,
+        'thread': threading.current_thread().name,
+    }, ensure_ascii=False))
+
+
+@contextlib.contextmanager
+def cronometro(operacao):
+    """Mede o bloco `with` (se a medição estiver ligada)."""
+    if not _ativo:
+        yield
+        return
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        yield
+    except Exception as e:
+        erro = type(e).__name__
+        raise
+    finally:
+        registrar(operacao, (time.perf_counter() - inicio) * 1000, erro)
+
+
+def medir(operacao):
+    """Decorador: mede cada chamada da função como `operacao`."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if not _ativo:
+                return funcao(*args, **kwargs)
+            inicio = time.perf_counter()
+            erro = None
+            try:
+                return funcao(*args, **kwargs)
+            except Exception as e:
+                erro = type(e).__name__
+                raise
+            finally:
+                registrar(operacao, (time.perf_counter() - inicio) * 1000, erro)
+        return medida
+    return decorador
+
+
+# --- Consulta ---
+def resumo():
+    """
+    Uma linha por operação: total de medidas, média, percentis e máximo (ms)
+    sobre as últimas AMOSTRAS_POR_OPERACAO medidas.
+    """
+    with _trava:
+        amostras = {operacao: np.fromiter(valores, float) for operacao, valores in _amostras.items()}
+        contagens = dict(_contagens)
+    linhas = []
+    for operacao in sorted(amostras):
+        valores = amostras[operacao]
+        linha = {'operacao': operacao, 'chamadas': contagens[operacao], 'media_ms': float(valores.mean())}
+        for p, valor in zip(PERCENTIS, np.percentile(valores, PERCENTIS)):
+            linha[f'p{p}_ms'] = float(valor)
+        linha['max_ms'] = float(valores.max())
+        linhas.append(linha)
+    return linhas
+
+
+def limpar():
+    """Descarta as medidas em memória (o log em arquivo é mantido)."""
+    with _trava:
+        _amostras.clear()
+        _contagens.clear()
@@ -0,0 +1,252 @@
+"""
+Leitura do número (BMP) da etiqueta por OCR, fora do fluxo de execução do Streamlit.
+
+As fotos são processadas por um grupo limitado de threads e os resultados
+ficam guardados pelo hash do conteúdo da imagem (LRU), então a mesma foto
+nunca é lida duas vezes, mesmo com as várias re-execuções da página.
+
+Antes do OCR a foto é reduzida e recortada na região da etiqueta (com NumPy).
+Algumas variantes baratas do recorte são lidas em paralelo e o número final
+é decidido por votação entre elas.
+
+O pytesseract e o PIL só são importados quando a primeira foto é lida, e o
+motor é configurado uma única vez por processo.
+"""
+import io
+import os
+import re
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import metricas
+
+# --- Configuração do Pytesseract ---
+CAMINHO_TESSERACT = os.environ.get('TESSERACT_CMD', r'C:\Program Files\Tesseract-OCR\tesseract.exe')
+
+# psm 7 (uma linha) funciona bem no recorte da etiqueta; psm 11 (Sparse text) cobre recortes imprecisos
+CONFIGS_TESSERACT = {
+    'psm7': r'--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789',
+    'psm11': r'--oem 3 --psm 11 -c tessedit_char_whitelist=0123456789',
+}
+LARGURA_MAXIMA = 1000
+# Desfoque antes da detecção de bordas e diferença mínima de cinza entre vizinhos para contar como borda
+RAIO_DESFOQUE = 2
+BORDA_MINIMA = 4.0
+MAX_TRABALHADORES = 2
+TAMANHO_CACHE = 128
+
+_executor = ThreadPoolExecutor(max_workers=MAX_TRABALHADORES, thread_name_prefix='ocr')
+# Grupo separado para as variantes, já que elas são disparadas de dentro de uma leitura
+_executor_variantes = ThreadPoolExecutor(
+    max_workers=MAX_TRABALHADORES * len(CONFIGS_TESSERACT) * 2, thread_name_prefix='ocr-variante'
+)
+_leituras = OrderedDict()  # hash da imagem -> Future com o número lido
+_trava = threading.Lock()
+_motor = None
+_trava_motor = threading.Lock()
+
+
+def motor():
+    """Importa e configura o pytesseract na primeira leitura; depois devolve o mesmo módulo."""
+    global _motor
+    if _motor is None:
+        with _trava_motor:
+            if _motor is None:
+                import pytesseract
+                # Sem o executável no caminho padrão do Windows, vale o tesseract do PATH
+                if os.path.exists(CAMINHO_TESSERACT):
+                    pytesseract.pytesseract.tesseract_cmd = CAMINHO_TESSERACT
+                _motor = pytesseract
+    return _motor
+
+
+# --- Pré-processamento ---
+def reduzir(image):
+    """Converte para escala de cinza e reduz a foto para no máximo LARGURA_MAXIMA pixels de largura."""
+    from PIL import Image
+
+    cinza = image.convert('L')
+    if cinza.width > LARGURA_MAXIMA:
+        altura = round(cinza.height * LARGURA_MAXIMA / cinza.width)
+        cinza = cinza.resize((LARGURA_MAXIMA, altura), Image.BILINEAR)
+    return np.asarray(cinza, dtype=np.float32)
+
+
+def _media_movel(perfil, janela):
+    acumulado = np.cumsum(np.concatenate(([0.0], perfil)))
+    janela = max(int(janela), 1)
+    medias = (acumulado[janela:] - acumulado[:-janela]) / janela
+    # Mantém o tamanho do perfil original, centralizando a janela
+    inicio = (len(perfil) - len(medias)) // 2
+    return np.pad(medias, (inicio, len(perfil) - len(medias) - inicio), mode='edge')
+
+
+def _soma_janelas(cinza, raio):
+    """Soma dos pixels em uma janela (2*raio+1) ao redor de cada pixel, e a área da janela (imagem integral)."""
+    altura, largura = cinza.shape
+    integral = np.pad(cinza, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    y = np.arange(altura)
+    x = np.arange(largura)
+    y0, y1 = np.clip(y - raio, 0, altura), np.clip(y + raio + 1, 0, altura)
+    x0, x1 = np.clip(x - raio, 0, largura), np.clip(x + raio + 1, 0, largura)
+    soma = (integral[y1][:, x1] - integral[y0][:, x1] - integral[y1][:, x0] + integral[y0][:, x0])
+    return soma, np.outer(y1 - y0, x1 - x0)
+
+
+def desfocar(cinza, raio):
+    """Filtro de média (caixa) com a imagem integral; remove o ruído do sensor antes das bordas."""
+    soma, area = _soma_janelas(cinza, raio)
+    return soma / area
+
+
+def limiar_otsu(valores, minimo=0.0):
+    """Limiar de Otsu (maior variância entre as duas classes) de um conjunto de valores, nunca abaixo de `minimo`."""
+    histograma, limites = np.histogram(valores, bins=256)
+    centros = (limites[:-1] + limites[1:]) / 2
+    peso = np.cumsum(histograma)
+    soma = np.cumsum(histograma * centros)
+    total, soma_total = peso[-1], soma[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_baixo = soma / peso
+        media_alto = (soma_total - soma) / (total - peso)
+        variancia = peso * (total - peso) * (media_baixo - media_alto) ** 2
+    variancia = np.nan_to_num(variancia[:-1])
+    if not variancia.any():
+        return minimo
+    return max(float(centros[int(np.argmax(variancia))]), minimo)
+
+
+def _maior_faixa(perfil):
+    """Intervalo contínuo em torno do pico do perfil onde ele fica acima de metade do pico."""
+    pico = int(np.argmax(perfil))
+    acima = perfil >= perfil[pico] * 0.5
+    inicio = pico
+    while inicio > 0 and acima[inicio - 1]:
+        inicio -= 1
+    fim = pico
+    while fim < len(perfil) - 1 and acima[fim + 1]:
+        fim += 1
+    return inicio, fim + 1
+
+
+def detectar_regiao(cinza):
+    """
+    Encontra a região dos dígitos: a área com mais bordas verticais (traços dos números).
+    Retorna (topo, base, esquerda, direita); usa a imagem inteira se nada se destacar.
+    """
+    altura, largura = cinza.shape
+    # Sem o desfoque, o ruído do sensor gera bordas na imagem inteira
+    suave = desfocar(cinza, RAIO_DESFOQUE)
+    bordas = np.abs(np.diff(suave, axis=1))
+    mascara = bordas > limiar_otsu(bordas, BORDA_MINIMA)
+    if not mascara.any():
+        return 0, altura, 0, largura
+
+    linhas = _media_movel(mascara.mean(axis=1), altura * 0.03)
+    topo, base = _maior_faixa(linhas)
+    colunas = _media_movel(mascara[topo:base].mean(axis=0), largura * 0.05)
+    esquerda, direita = _maior_faixa(colunas)
+
+    # Margem ao redor dos dígitos para o Tesseract
+    margem_v = max((base - topo) // 2, 4)
+    margem_h = max((direita - esquerda) // 10, 4)
+    topo, base = max(topo - margem_v, 0), min(base + margem_v, altura)
+    esquerda, direita = max(esquerda - margem_h, 0), min(direita + margem_h, largura)
+    if (base - topo) < 12 or (direita - esquerda) < 24:
+        return 0, altura, 0, largura
+    return topo, base, esquerda, direita
+
+
+def esticar_contraste(cinza):
+    """Estica os níveis de cinza entre os percentis 2 e 98 (ajuda em etiquetas foscas ou com reflexo)."""
+    baixo, alto = np.percentile(cinza, (2, 98))
+    if alto - baixo < 1:
+        return cinza.astype(np.uint8)
+    return np.clip((cinza - baixo) * (255.0 / (alto - baixo)), 0, 255).astype(np.uint8)
+
+
+def limiar_adaptativo(cinza, janela=None, deslocamento=10.0):
+    """Binariza comparando cada pixel com a média da vizinhança (imagem integral)."""
+    altura, largura = cinza.shape
+    janela = janela or max((min(altura, largura) // 8) | 1, 15)
+    soma, area = _soma_janelas(cinza, janela // 2)
+    return np.where(cinza < soma / area - deslocamento, 0, 255).astype(np.uint8)
+
+
+@metricas.medir('ocr.preprocessar')
+def preprocessar_etiqueta(image):
+    """Reduz a foto, recorta a região da etiqueta e retorna as variantes a serem lidas."""
+    from PIL import Image
+
+    cinza = reduzir(image)
+    topo, base, esquerda, direita = detectar_regiao(cinza)
+    recorte = cinza[topo:base, esquerda:direita]
+    return {
+        'contraste': Image.fromarray(esticar_contraste(recorte)),
+        'limiar': Image.fromarray(limiar_adaptativo(recorte)),
+    }
+
+
+# --- Leitura ---
+def hash_imagem(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+
+@metricas.medir('ocr.tesseract')
+def _ler_variante(imagem, config):
+    texto_extraido = motor().image_to_string(imagem, config=config)
+    numeros = re.findall(r'\d+', texto_extraido)
+    # O BMP costuma ser o maior número da etiqueta
+    return max(numeros, key=len) if numeros else ""
+
+
+def votar(candidatos):
+    """Número mais lido entre as variantes; empates favorecem o número mais longo."""
+    votos = Counter(c for c in candidatos if c)
+    if not votos:
+        return ""
+    return max(votos, key=lambda numero: (votos[numero], len(numero)))
+
+
+@metricas.medir('ocr.ler_etiqueta')
+def ler_numero_etiqueta(dados):
+    """Executa o OCR sobre os bytes da foto e retorna o número da etiqueta (ou "")."""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(dados))
+    variantes = preprocessar_etiqueta(image)
+    leituras = [
+        _executor_variantes.submit(_ler_variante, imagem, config)
+        for imagem in variantes.values()
+        for config in CONFIGS_TESSERACT.values()
+    ]
+    return votar([leitura.result() for leitura in leituras])
+
+
+def solicitar_leitura(dados):
+    """
+    Agenda o OCR da foto, se ela ainda não foi lida, e retorna (hash, Future).
+    O Future de uma foto já conhecida é reaproveitado.
+    """
+    chave = hash_imagem(dados)
+    with _trava:
+        leitura = _leituras.get(chave)
+        if leitura is not None:
+            _leituras.move_to_end(chave)
+            return chave, leitura
+        leitura = _leituras[chave] = _executor.submit(ler_numero_etiqueta, dados)
+        # Descarta as leituras concluídas mais antigas quando o cache enche
+        excedente = len(_leituras) - TAMANHO_CACHE
+        for antiga in [c for c, f in _leituras.items() if f.done()][:max(excedente, 0)]:
+            del _leituras[antiga]
+    return chave, leitura
+
+
+def obter_leitura(chave):
+    """Retorna o Future da leitura da foto com esse hash, ou None se ela não está no cache."""
+    with _trava:
+        return _leituras.get(chave)
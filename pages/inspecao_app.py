@@ -1,17 +1,12 @@
 import streamlit as st
-import pandas as pd
-from PIL import Image
-import pytesseract
-import os
-import re
-from datetime import datetime
-import google.generativeai as genai
-
-# --- Configuração do Pytesseract ---
-try:
-    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-except Exception:
-    pass
+from datetime import date, timedelta
+
+import armazenamento
+import busca
+import componentes
+import esquema
+import ia
+import ocr
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -19,6 +14,7 @@ st.set_page_config(
     page_icon="🤖",
     layout="wide"
 )
+componentes.iniciar_execucao()
 
 # --- Barra Lateral para Configuração da IA ---
 with st.sidebar:
@@ -36,47 +32,40 @@ with st.sidebar:
 st.title('📦 Sistema de Inspeção por Câmera com IA')
 st.write("Aponte a câmera, identifique o produto e use a IA para registrar seu estado.")
 
-# --- Nomes dos Arquivos e Colunas (Seu original) ---
-NOME_ARQUIVO_DADOS = 'Inventario-H8 - itens.csv'
-COLUNAS = ['BMP', 'Itens', 'apartamento', 'situacao', 'data_atualizacao', 'ultimo_comentario']
+# --- Base de Dados e Colunas (Seu original) ---
+BASE = 'inventario'
+LIMITE_HISTORICO = 1000
+COLUNAS_HISTORICO = {
+    'codigo': st.column_config.TextColumn('BMP'),
+    'momento': st.column_config.DatetimeColumn('Data', format='DD/MM/YYYY HH:mm:ss'),
+    'evento': st.column_config.TextColumn('Evento'),
+    'situacao': st.column_config.TextColumn('Situação'),
+    'comentario': st.column_config.TextColumn('Comentário', width='large'),
+}
 
 # --- Funções ---
 
-# ↓↓↓ CORREÇÃO APLICADA AQUI ↓↓↓
-def preprocess_image_for_ocr(image):
-    """Converte a imagem para escala de cinza, que o Tesseract (OEM 3) processa bem."""
-    grayscale_image = image.convert('L')
-    # Remoção da binarização manual (threshold). 
-    # Deixar o Tesseract lidar com a escala de cinza é melhor para superfícies reflexivas.
-    return grayscale_image
-
-def carregar_dados():
-    if os.path.exists(NOME_ARQUIVO_DADOS):
-        df = pd.read_csv(NOME_ARQUIVO_DADOS, dtype={'BMP': str})
-        for col in COLUNAS:
-            if col not in df.columns:
-                df[col] = ''
-    else:
-        df = pd.DataFrame(columns=COLUNAS)
-    return df
-
-def salvar_dados(df):
-    df.to_csv(NOME_ARQUIVO_DADOS, index=False)
-
 def analisar_imagem_com_gemini(api_key, imagem, prompt):
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content([prompt, imagem])
-        return response.text
+        return ia.analisar_imagem(api_key, imagem, prompt)
     except Exception as e:
         return f"Erro ao conectar com a API do Gemini: {e}"
 
+@st.fragment(run_every=1)
+def aguardar_leitura_ocr(chave_foto):
+    """Mostra o estado pendente e re-executa a página quando o OCR da foto termina."""
+    leitura = ocr.obter_leitura(chave_foto)
+    if leitura is None or leitura.done():
+        st.rerun()
+    st.info("⏳ Lendo texto da etiqueta...")
+
 # --- Inicialização do Session State ---
 if 'produto_encontrado' not in st.session_state:
     st.session_state.produto_encontrado = None
 if 'numero_lido_ocr' not in st.session_state:
     st.session_state.numero_lido_ocr = ""
+if 'foto_etiqueta_lida' not in st.session_state:
+    st.session_state.foto_etiqueta_lida = None
 if 'item_nao_encontrado_id' not in st.session_state:
     st.session_state.item_nao_encontrado_id = None
 if 'ai_comment' not in st.session_state:
@@ -93,21 +82,20 @@ with col1:
     picture_label = st.camera_input("Aponte para a ETIQUETA e tire a foto")
 
     if picture_label:
-        image = Image.open(picture_label)
-        with st.spinner('Lendo texto da etiqueta...'):
-            try:
-                preprocessed_image = preprocess_image_for_ocr(image)
-                
-                # ↓↓↓ CORREÇÃO APLICADA AQUI ↓↓↓
-                # ATUALIZAÇÃO: Mudando de psm 6 para 11 (Sparse text) para melhor detecção
-                custom_config = r'--oem 3 --psm 11 -c tessedit_char_whitelist=0123456789'
-                
-                texto_extraido = pytesseract.image_to_string(preprocessed_image, config=custom_config)
-                match = re.search(r'\d+', texto_extraido)
-                st.session_state.numero_lido_ocr = match.group(0) if match else ""
-            except Exception as e:
-                st.error(f"Erro no processamento OCR: {e}")
-                st.session_state.numero_lido_ocr = ""
+        # O OCR roda em segundo plano e cada foto é lida uma única vez
+        chave_foto, leitura = ocr.solicitar_leitura(picture_label.getvalue())
+        # A próxima etapa costuma ser a análise do item: o cliente da IA é preparado enquanto isso
+        ia.aquecer(st.session_state.get('gemini_api_key'))
+        if st.session_state.foto_etiqueta_lida != chave_foto:
+            if leitura.done():
+                st.session_state.foto_etiqueta_lida = chave_foto
+                try:
+                    st.session_state.numero_lido_ocr = leitura.result()
+                except Exception as e:
+                    st.error(f"Erro no processamento OCR: {e}")
+                    st.session_state.numero_lido_ocr = ""
+            else:
+                aguardar_leitura_ocr(chave_foto)
 
     with st.form(key="search_form"):
         numero_para_busca = st.text_input("Código do Item (BMP):", value=st.session_state.numero_lido_ocr)
@@ -120,10 +108,9 @@ with col1:
             st.session_state.inspection_mode = None
             
             if numero_para_busca:
-                df = carregar_dados()
-                produto_info = df[df['BMP'] == numero_para_busca]
-                if not produto_info.empty:
-                    st.session_state.produto_encontrado = produto_info.iloc[0].to_dict()
+                produto_info = armazenamento.buscar_item(BASE, numero_para_busca)
+                if produto_info:
+                    st.session_state.produto_encontrado = produto_info
                     st.session_state.inspection_mode = 'choice'
                 else:
                     st.warning(f"O item {numero_para_busca} não está no inventário. Cadastre-o abaixo.")
@@ -135,6 +122,16 @@ with col1:
         st.success(f"Item Encontrado: **{st.session_state.produto_encontrado['Itens']}**")
 
     if st.session_state.item_nao_encontrado_id:
+        # Sugere os códigos existentes mais parecidos, para corrigir uma leitura errada do OCR
+        sugestoes = busca.codigos_proximos(BASE, st.session_state.item_nao_encontrado_id)
+        if sugestoes:
+            st.write("**Você quis dizer?** Toque no item correto para selecioná-lo:")
+            for item in armazenamento.buscar_itens(BASE, sugestoes).to_dict('records'):
+                if st.button(f"{item['BMP']} · {item['Itens']} (Apto: {item['apartamento']})", key=f"sugestao_{item['BMP']}"):
+                    st.session_state.produto_encontrado = item
+                    st.session_state.item_nao_encontrado_id = None
+                    st.session_state.inspection_mode = 'choice'
+                    st.rerun()
         st.write("---")
         st.subheader("Cadastrar Novo Item no Inventário")
         # (código de cadastro omitido para brevidade, mas está no seu original)
@@ -148,6 +145,16 @@ with col2:
         st.markdown(f"**Item Selecionado:**")
         st.markdown(f"### {produto['Itens']} (ID: {produto['BMP']})")
 
+        with st.expander("📜 Histórico de Inspeções deste Item"):
+            historico = armazenamento.historico_item(BASE, produto['BMP'])
+            if historico.empty:
+                st.info("Nenhuma alteração registrada para este item.")
+            else:
+                st.dataframe(
+                    historico.iloc[::-1], hide_index=True, use_container_width=True,
+                    column_config=COLUNAS_HISTORICO
+                )
+
         # Escolha de Ação
         if st.session_state.inspection_mode == 'choice':
             if st.button("📸 Analisar com Câmera (IA)"):
@@ -167,9 +174,8 @@ with col2:
                     st.error("AVISO: Chave da API do Gemini não inserida. Por favor, insira a chave na barra lateral para continuar.")
                 else:
                     with st.spinner("A IA está analisando a imagem do item..."):
-                        img_para_analise = Image.open(picture_item)
-                        prompt = "Descreva o estado de conservação do objeto principal nesta imagem. Foque em detalhes como arranhões, amassados, manchas, rasgos ou qualquer outro defeito visível. Se o objeto parecer estar em bom estado, mencione isso também."
-                        st.session_state.ai_comment = analisar_imagem_com_gemini(st.session_state.gemini_api_key, img_para_analise, prompt)
+                        img_para_analise = picture_item.getvalue()
+                        st.session_state.ai_comment = analisar_imagem_com_gemini(st.session_state.gemini_api_key, img_para_analise, ia.PROMPT_ESTADO_CONSERVACAO)
                     
                     st.session_state.inspection_mode = 'manual'
                     st.rerun()
@@ -186,15 +192,12 @@ with col2:
                 submit_button = st.form_submit_button("Salvar Alterações")
 
                 if submit_button:
-                    df = carregar_dados()
-                    idx = df.index[df['BMP'] == produto['BMP']].tolist()
-                    if idx:
-                        index = idx[0]
-                        data_atual = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-                        df.loc[index, 'situacao'] = nova_situacao
-                        df.loc[index, 'ultimo_comentario'] = comentario
-                        df.loc[index, 'data_atualizacao'] = data_atual
-                        salvar_dados(df)
+                    if armazenamento.buscar_item(BASE, produto['BMP']) is not None:
+                        data_atual = esquema.agora()
+                        armazenamento.salvar_item(BASE, {
+                            'BMP': produto['BMP'], 'situacao': nova_situacao,
+                            'ultimo_comentario': comentario, 'data_atualizacao': data_atual
+                        })
                         st.success(f"Item {produto['BMP']} atualizado com sucesso!")
                         
                         st.session_state.produto_encontrado = None
@@ -205,3 +208,23 @@ with col2:
                         st.error("Ocorreu um erro ao tentar salvar. Item não encontrado.")
     else:
         st.info("Busque e identifique um item para atualizar.")
+
+# --- Histórico de Alterações por Período ---
+st.divider()
+with st.expander("🗓️ Alterações por Período"):
+    hoje = date.today()
+    periodo = st.date_input(
+        "Período:", value=(hoje - timedelta(days=7), hoje), max_value=hoje, format="DD/MM/YYYY"
+    )
+    if len(periodo) == 2:
+        inicio, fim = periodo
+        alteracoes = armazenamento.historico_periodo(BASE, inicio, fim + timedelta(days=1), limite=LIMITE_HISTORICO)
+        if alteracoes.empty:
+            st.info("Nenhuma alteração no período.")
+        else:
+            if len(alteracoes) == LIMITE_HISTORICO:
+                st.caption(f"Exibindo as primeiras {LIMITE_HISTORICO} alterações do período.")
+            st.dataframe(alteracoes, hide_index=True, use_container_width=True, column_config=COLUNAS_HISTORICO)
+
+# --- Desempenho (depuração) ---
+componentes.painel_desempenho('inspecao')
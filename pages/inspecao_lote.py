@@ -0,0 +1,171 @@
+import streamlit as st
+import pandas as pd
+
+import armazenamento
+import componentes
+import esquema
+import ia
+import lote
+
+# --- Configuração da Página ---
+st.set_page_config(
+    page_title="Inspeção em Lote",
+    page_icon="🗂️",
+    layout="wide"
+)
+componentes.iniciar_execucao()
+
+# --- Barra Lateral para Configuração da IA ---
+with st.sidebar:
+    st.header("🤖 Configuração da IA")
+    gemini_api_key = st.text_input(
+        "Chave da API do Google Gemini",
+        type="password",
+        value=st.session_state.get('gemini_api_key', ''),
+        help="Obtenha sua chave em https://aistudio.google.com/app/apikey"
+    )
+    if gemini_api_key:
+        st.session_state.gemini_api_key = gemini_api_key
+        st.success("API Key inserida!", icon="✅")
+
+# --- Título da Página ---
+st.title('🗂️ Inspeção em Lote')
+st.write("Fotografe a etiqueta e o item de cada produto e siga para o próximo. "
+         "A leitura e a análise da IA acontecem em segundo plano; no final, revise tudo e salve de uma vez.")
+
+BASE = 'inventario'
+# Colunas que o inspetor pode alterar na tabela de revisão
+CAMPOS_EDITAVEIS = ['salvar', 'BMP', 'situacao', 'ultimo_comentario']
+
+# --- Funções ---
+@st.fragment(run_every=2)
+def acompanhar_fila(pendentes, total):
+    """Mostra o progresso e re-executa a página quando todas as fotos forem processadas."""
+    if not any(not tarefa['futuro'].done() for tarefa in pendentes):
+        st.rerun()
+    concluidas = sum(tarefa['futuro'].done() for tarefa in st.session_state.fila_lote)
+    st.progress(concluidas / total, text=f"⏳ Processando fotos: {concluidas} de {total} concluídas")
+
+def montar_revisao(tarefas, edicoes):
+    """
+    Tabela de revisão com o resultado de cada foto e o item correspondente no inventário.
+    As `edicoes` já feitas pelo inspetor (id -> campos alterados) prevalecem sobre o resultado.
+    """
+    linhas = []
+    for tarefa in tarefas:
+        resultado = tarefa['futuro'].result()
+        edicao = edicoes.get(tarefa['id'], {})
+        linhas.append({
+            'id': tarefa['id'], 'BMP': edicao.get('BMP', resultado['BMP']),
+            'ultimo_comentario': edicao.get('ultimo_comentario', resultado['comentario']),
+            'avisos': '; '.join(resultado['erros']),
+        })
+    revisao = pd.DataFrame(linhas, columns=['id', 'BMP', 'ultimo_comentario', 'avisos'])
+    itens = armazenamento.buscar_itens(BASE, revisao['BMP'].tolist())
+    revisao = revisao.merge(itens[['BMP', 'Itens', 'situacao']], on='BMP', how='left')
+    revisao['encontrado'] = revisao['Itens'].notna()
+    revisao['salvar'] = revisao['encontrado']
+    # situação é categórica no inventário; na revisão é texto editável
+    revisao[['Itens', 'situacao']] = revisao[['Itens', 'situacao']].astype('string').fillna('').astype(str)
+    for col in ('salvar', 'situacao'):
+        revisao[col] = [edicoes.get(i, {}).get(col, valor) for i, valor in zip(revisao['id'], revisao[col])]
+    return revisao[['id', 'salvar', 'BMP', 'Itens', 'situacao', 'ultimo_comentario', 'encontrado', 'avisos']]
+
+# --- Inicialização do Session State ---
+if 'fila_lote' not in st.session_state:
+    st.session_state.fila_lote = []
+if 'contador_lote' not in st.session_state:
+    st.session_state.contador_lote = 0
+if 'edicoes_lote' not in st.session_state:
+    st.session_state.edicoes_lote = {}
+
+# --- ETAPA 1: CAPTURA ---
+st.header("1. Fotografar Itens")
+n = st.session_state.contador_lote
+col1, col2 = st.columns(2)
+with col1:
+    foto_etiqueta = st.camera_input("Foto da ETIQUETA", key=f"lote_etiqueta_{n}")
+with col2:
+    foto_item = st.camera_input("Foto do ITEM COMPLETO", key=f"lote_item_{n}")
+
+if not st.session_state.get('gemini_api_key'):
+    st.info("Sem chave da API do Gemini, apenas a leitura da etiqueta será feita.")
+elif foto_etiqueta or foto_item:
+    # Prepara o cliente da IA em segundo plano assim que a primeira foto é tirada
+    ia.aquecer(st.session_state.gemini_api_key)
+
+if st.button("➕ Adicionar à fila", disabled=not (foto_etiqueta and foto_item)):
+    futuro = lote.enviar(
+        foto_etiqueta.getvalue(), foto_item.getvalue(), st.session_state.get('gemini_api_key')
+    )
+    st.session_state.fila_lote.append({'id': n, 'futuro': futuro})
+    # Nova chave nas câmeras para liberar a captura do próximo item
+    st.session_state.contador_lote += 1
+    st.rerun()
+
+# --- ETAPA 2: REVISÃO E GRAVAÇÃO ---
+st.header("2. Revisar e Salvar")
+fila = st.session_state.fila_lote
+if not fila:
+    st.info("A fila está vazia. Fotografe um item e adicione-o à fila.")
+else:
+    pendentes = [tarefa for tarefa in fila if not tarefa['futuro'].done()]
+    if pendentes:
+        acompanhar_fila(pendentes, len(fila))
+
+    concluidas = [tarefa for tarefa in fila if tarefa['futuro'].done()]
+    if concluidas:
+        edicoes = st.session_state.edicoes_lote
+        revisao = montar_revisao(concluidas, edicoes)
+        editada = st.data_editor(
+            revisao,
+            hide_index=True,
+            use_container_width=True,
+            disabled=['id', 'Itens', 'encontrado', 'avisos'],
+            column_config={
+                'id': None,
+                'salvar': st.column_config.CheckboxColumn('Salvar'),
+                'BMP': st.column_config.TextColumn('BMP'),
+                'Itens': st.column_config.TextColumn('Item'),
+                'situacao': st.column_config.TextColumn('Situação'),
+                'ultimo_comentario': st.column_config.TextColumn('Comentário de Inspeção', width='large'),
+                'encontrado': st.column_config.CheckboxColumn('No inventário'),
+                'avisos': st.column_config.TextColumn('Avisos'),
+            },
+            # A tabela muda quando outra foto termina; a chave acompanha o conjunto de
+            # tarefas e as edições ficam em `edicoes_lote`, reaplicadas em `montar_revisao`
+            key="revisao_lote_" + "_".join(str(tarefa['id']) for tarefa in concluidas),
+        )
+        for original, atual in zip(revisao.to_dict('records'), editada.to_dict('records')):
+            alterados = {col: atual[col] for col in CAMPOS_EDITAVEIS if atual[col] != original[col]}
+            if alterados:
+                edicoes[original['id']] = {**edicoes.get(original['id'], {}), **alterados}
+
+        col_salvar, col_limpar = st.columns(2)
+        if col_salvar.button("💾 Salvar itens marcados", type="primary"):
+            marcados = editada[editada['salvar']]
+            existentes = set(armazenamento.buscar_itens(BASE, marcados['BMP'].tolist())['BMP'])
+            validos = marcados[marcados['BMP'].isin(existentes)]
+            data_atual = esquema.agora()
+            armazenamento.salvar_itens(BASE, [
+                {'BMP': linha['BMP'], 'situacao': linha['situacao'],
+                 'ultimo_comentario': linha['ultimo_comentario'], 'data_atualizacao': data_atual}
+                for linha in validos.to_dict('records')
+            ])
+            ignorados = marcados[~marcados['BMP'].isin(existentes)]
+            salvos = set(validos['id'])
+            st.session_state.fila_lote = [t for t in fila if t['id'] not in salvos]
+            for id_tarefa in salvos:
+                edicoes.pop(id_tarefa, None)
+            st.success(f"{len(validos)} item(s) atualizados com sucesso!")
+            if not ignorados.empty:
+                st.warning(f"Não estão no inventário e não foram salvos: {', '.join(ignorados['BMP'])}")
+            else:
+                st.rerun()
+        if col_limpar.button("🗑️ Limpar fila"):
+            st.session_state.fila_lote = []
+            st.session_state.edicoes_lote = {}
+            st.rerun()
+
+# --- Desempenho (depuração) ---
+componentes.painel_desempenho('inspecao_lote')
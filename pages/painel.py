@@ -0,0 +1,113 @@
+import streamlit as st
+
+import armazenamento
+import componentes
+
+# --- Configuração da Página ---
+st.set_page_config(
+    page_title="Painel do Inventário",
+    page_icon="📊",
+    layout="wide"
+)
+componentes.iniciar_execucao()
+
+# --- CONFIGURAÇÕES GERAIS ---
+BASE = 'inventario'
+SITUACOES_DESTAQUE = ['A reparar', 'Em trânsito']
+DIAS_SEM_INSPECAO = 90
+VAZIO = '(vazio)'
+TOTAL = 'Total'
+
+# --- FUNÇÕES AUXILIARES ---
+def tabela_resumo():
+    """
+    Apartamentos x situações a partir do resumo mantido pelo armazenamento
+    (uma linha por combinação existente, não por item), com totais.
+    """
+    resumo = armazenamento.resumo_situacoes(BASE)
+    tabela = resumo.pivot_table(
+        index='apartamento', columns='situacao', values='quantidade', aggfunc='sum', fill_value=0
+    )
+    tabela[TOTAL] = tabela.sum(axis=1)
+    tabela.loc[TOTAL] = tabela.sum()
+    return tabela.astype(int)
+
+def filtro_da_celula(tabela, linha, coluna):
+    """Filtros da lista de itens correspondentes a uma célula da tabela de resumo."""
+    filtro = {}
+    if linha < len(tabela) - 1:  # a última linha é a dos totais
+        filtro['apartamento'] = tabela.index[linha]
+    if coluna not in ('Apartamento', TOTAL):
+        filtro['situacao'] = '' if coluna == VAZIO else coluna
+    return filtro
+
+def descrever(filtro):
+    partes = []
+    if 'apartamento' in filtro:
+        partes.append(f"apartamento **{filtro['apartamento'] or VAZIO}**")
+    if 'situacao' in filtro:
+        partes.append(f"situação **{filtro['situacao'] or VAZIO}**")
+    if 'sem_inspecao_dias' in filtro:
+        partes.append(f"sem inspeção há mais de **{filtro['sem_inspecao_dias']}** dias")
+    return ', '.join(partes) or 'todos os itens'
+
+# --- Inicialização do Session State ---
+if 'painel_filtro' not in st.session_state:
+    st.session_state.painel_filtro = None
+if 'painel_celula' not in st.session_state:
+    st.session_state.painel_celula = None
+
+# --- INTERFACE DA APLICAÇÃO ---
+st.title('📊 Painel do Inventário H8')
+st.write('Quantidade de itens por apartamento e situação. Clique em uma célula para ver os itens.')
+
+dias = st.number_input(
+    'Considerar sem inspeção após (dias):', min_value=1, value=DIAS_SEM_INSPECAO, step=1
+)
+colunas_metricas = st.columns(len(SITUACOES_DESTAQUE) + 2)
+colunas_metricas[0].metric('Itens no inventário', armazenamento.contar_itens(BASE))
+for coluna, situacao in zip(colunas_metricas[1:], SITUACOES_DESTAQUE):
+    coluna.metric(situacao, armazenamento.contar_itens(BASE, situacao=situacao))
+sem_inspecao = armazenamento.contar_itens(BASE, sem_inspecao_dias=dias)
+colunas_metricas[-1].metric(f'Sem inspeção há {dias}+ dias', sem_inspecao)
+if st.button(f'🔎 Ver os {sem_inspecao} itens sem inspeção', disabled=not sem_inspecao):
+    st.session_state.painel_filtro = {'sem_inspecao_dias': dias}
+
+# --- RESUMO POR APARTAMENTO E SITUAÇÃO ---
+st.subheader('Itens por Apartamento e Situação')
+tabela = tabela_resumo()
+if len(tabela) == 1:
+    st.info('O inventário está vazio.')
+else:
+    exibicao = tabela.rename(index=lambda valor: valor or VAZIO, columns=lambda valor: valor or VAZIO)
+    exibicao = exibicao.rename_axis(index='Apartamento', columns=None).reset_index()
+    evento = st.dataframe(
+        exibicao,
+        hide_index=True,
+        use_container_width=True,
+        on_select='rerun',
+        selection_mode='single-cell',
+        key='painel_resumo',
+    )
+    celula = evento.selection.cells[0] if evento.selection.cells else None
+    # Só uma célula recém-clicada troca o filtro (o botão acima também pode defini-lo)
+    if celula != st.session_state.painel_celula:
+        st.session_state.painel_celula = celula
+        if celula is not None:
+            st.session_state.painel_filtro = filtro_da_celula(tabela, *celula)
+
+# --- ITENS DO FILTRO ESCOLHIDO ---
+filtro = st.session_state.painel_filtro
+if filtro is not None:
+    st.subheader('Itens Selecionados')
+    col_descricao, col_limpar = st.columns((4, 1))
+    col_descricao.markdown(f'Filtro: {descrever(filtro)}')
+    if col_limpar.button('✖️ Limpar filtro'):
+        st.session_state.painel_filtro = None
+        st.rerun()
+    # Uma chave por filtro, para que a paginação recomece a cada troca
+    chave = 'painel_' + '_'.join(f'{nome}-{valor}' for nome, valor in sorted(filtro.items()))
+    componentes.tabela_paginada(BASE, chave=chave, filtros=filtro)
+
+# --- Desempenho (depuração) ---
+componentes.painel_desempenho('painel')
@@ -0,0 +1,298 @@
+"""
+Serviço HTTP (sem interface) e linha de comando para leitores de código de barras e scripts.
+
+Usa a mesma camada de armazenamento das páginas, sem passar pelo Streamlit.
+Cada conexão HTTP é atendida pela sua própria thread (`ThreadingHTTPServer`),
+então um leitor ocioso nunca impede que outro seja atendido. As conexões HTTP
+são persistentes (keep-alive), para que um leitor envie muitas requisições
+seguidas sem abrir uma conexão por leitura; como cada thread mantém a sua
+conexão SQLite (ver `armazenamento.conectar`), ela é reaproveitada por todas as
+requisições da mesma conexão HTTP.
+
+Rotas (JSON):
+    GET  /saude                   -> {"itens": n, "versao": v}
+    GET  /itens/<codigo>          -> item (404 se não existe)
+    POST /itens/buscar            {"codigos": [...]} -> {"itens": [...], "nao_encontrados": [...]}
+    POST /itens                   {"itens": [{...}, ...]} -> {"gravados": n}  (insere ou atualiza)
+    POST /itens/situacao          {"codigos": [...], "situacao": "...", "comentario": "..."}
+                                  -> {"atualizados": n, "nao_encontrados": [...]}
+
+Uso pela linha de comando:
+    python servico.py servir [--porta 8502]
+    python servico.py buscar 123456 123457       (ou "-" para ler os códigos da entrada padrão)
+    python servico.py situacao "Em uso" 123456 123457 [--comentario "..."]
+    python servico.py gravar itens.json
+"""
+import sys
+import json
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, unquote
+
+import pandas as pd
+
+import armazenamento
+import esquema
+import metricas
+
+BASE = 'inventario'
+PORTA = 8502
+LIMITE_LOTE = 5000
+TAMANHO_MAXIMO_CORPO = 10 * 2 ** 20
+TEMPO_OCIOSO = 30
+
+
+class ErroRequisicao(Exception):
+    """Requisição inválida; vira uma resposta com o código HTTP informado."""
+
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+# --- Operações (compartilhadas pelo HTTP e pela linha de comando) ---
+def _codigos(codigos):
+    if not isinstance(codigos, list) or not codigos:
+        raise ErroRequisicao('Informe "codigos" como uma lista não vazia.')
+    if len(codigos) > LIMITE_LOTE:
+        raise ErroRequisicao(f'No máximo {LIMITE_LOTE} códigos por requisição.')
+    return [str(codigo).strip() for codigo in codigos]
+
+
+def buscar(codigos, base=BASE):
+    """Busca vários códigos de uma vez; retorna os itens encontrados (na ordem pedida) e os que faltam."""
+    codigos = _codigos(codigos)
+    itens = armazenamento.buscar_registros(base, codigos)
+    encontrados = {item[esquema.CHAVE] for item in itens}
+    return {'itens': itens, 'nao_encontrados': [c for c in codigos if c not in encontrados]}
+
+
+def gravar(itens, base=BASE):
+    """
+    Insere ou atualiza vários itens em uma transação (apenas os campos enviados são alterados).
+    Itens novos precisam das colunas obrigatórias da base; as datas são aceitas no
+    formato ISO ou no antigo (dia/mês/ano) e gravadas em ISO. A data de atualização
+    enviada é mantida; sem ela, só os itens já cadastrados recebem a data atual.
+    """
+    if not isinstance(itens, list) or not itens:
+        raise ErroRequisicao('Informe "itens" como uma lista não vazia.')
+    if len(itens) > LIMITE_LOTE:
+        raise ErroRequisicao(f'No máximo {LIMITE_LOTE} itens por requisição.')
+    config = armazenamento.BASES[base]
+    colunas = set(config['colunas'])
+    agora = esquema.agora()
+    validos = []
+    for posicao, item in enumerate(itens):
+        if not isinstance(item, dict) or not str(item.get(esquema.CHAVE, '')).strip():
+            raise ErroRequisicao(f'Item {posicao}: o campo "{esquema.CHAVE}" é obrigatório.')
+        desconhecidas = set(item) - colunas
+        if desconhecidas:
+            raise ErroRequisicao(f'Item {posicao}: colunas desconhecidas: {", ".join(sorted(desconhecidas))}.')
+        if 'situacao' in item and item['situacao'] not in esquema.OPCOES_SITUACAO:
+            raise ErroRequisicao(f'Item {posicao}: situação fora da lista permitida.')
+        validos.append({**item, esquema.CHAVE: str(item[esquema.CHAVE]).strip()})
+    _converter_datas(validos)
+    existentes = {
+        item[esquema.CHAVE] for item in armazenamento.buscar_registros(base, [item[esquema.CHAVE] for item in validos])
+    }
+    for posicao, item in enumerate(validos):
+        if item[esquema.CHAVE] in existentes:
+            if not item.get('data_atualizacao'):
+                item['data_atualizacao'] = agora
+        else:
+            faltando = [col for col in config['obrigatorias'] if not str(item.get(col) or '').strip()]
+            if faltando:
+                raise ErroRequisicao(f'Item {posicao}: campos obrigatórios para um item novo: {", ".join(faltando)}.')
+            if not item.get('data_cadastro'):
+                item['data_cadastro'] = agora
+    armazenamento.salvar_itens(base, validos)
+    return {'gravados': len(validos)}
+
+
+def _converter_datas(itens):
+    """Converte as datas enviadas para o texto ISO do banco (de uma vez para todo o lote)."""
+    for col in esquema.COLUNAS_DATA:
+        posicoes = [i for i, item in enumerate(itens) if str(item.get(col) or '').strip()]
+        if not posicoes:
+            continue
+        datas = esquema.converter_datas([str(itens[i][col]).strip() for i in posicoes])
+        for i, data in zip(posicoes, datas):
+            if pd.isna(data):
+                raise ErroRequisicao(f'Item {i}: data inválida em "{col}" (use AAAA-MM-DD HH:MM:SS).')
+            itens[i][col] = data.strftime(esquema.FORMATO_DATA)
+
+
+def atualizar_situacao(codigos, situacao, comentario=None, base=BASE):
+    """Atualiza a situação (e, opcionalmente, o comentário) dos códigos já cadastrados."""
+    codigos = _codigos(codigos)
+    if situacao not in esquema.OPCOES_SITUACAO:
+        raise ErroRequisicao('Situação fora da lista permitida.')
+    existentes = {item[esquema.CHAVE] for item in armazenamento.buscar_registros(base, codigos)}
+    agora = esquema.agora()
+    alteracoes = []
+    for codigo in dict.fromkeys(codigos):
+        if codigo in existentes:
+            item = {esquema.CHAVE: codigo, 'situacao': situacao, 'data_atualizacao': agora}
+            if comentario is not None:
+                item['ultimo_comentario'] = comentario
+            alteracoes.append(item)
+    armazenamento.salvar_itens(base, alteracoes)
+    return {'atualizados': len(alteracoes), 'nao_encontrados': [c for c in codigos if c not in existentes]}
+
+
+# --- Servidor HTTP ---
+class ManipuladorInventario(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    timeout = TEMPO_OCIOSO
+    # Respostas pequenas em conexões persistentes: sem o algoritmo de Nagle cada
+    # resposta sai na hora, em vez de esperar o ACK da anterior (~40 ms)
+    disable_nagle_algorithm = True
+    server_version = 'InventarioH8'
+
+    def do_GET(self):
+        if self.headers.get('Content-Length') or self.headers.get('Transfer-Encoding'):
+            # O corpo de um GET não é lido; o que vier depois dele não pode virar outra requisição
+            self.close_connection = True
+        caminho = urlparse(self.path).path.rstrip('/')
+        if caminho == '/saude':
+            self._atender('saude', lambda: {
+                'itens': armazenamento.contar_itens(BASE), 'versao': armazenamento.versao_base(BASE)
+            })
+        elif caminho.startswith('/itens/'):
+            codigo = unquote(caminho[len('/itens/'):])
+            self._atender('item', lambda: self._item(codigo))
+        else:
+            self._responder(404, {'erro': 'Rota não encontrada.'})
+
+    def do_POST(self):
+        caminho = urlparse(self.path).path.rstrip('/')
+        rotas = {
+            '/itens/buscar': ('buscar', lambda corpo: buscar(corpo.get('codigos'))),
+            '/itens': ('gravar', lambda corpo: gravar(corpo.get('itens'))),
+            '/itens/situacao': ('situacao', lambda corpo: atualizar_situacao(
+                corpo.get('codigos'), corpo.get('situacao'), corpo.get('comentario')
+            )),
+        }
+        if caminho not in rotas:
+            self.close_connection = True  # o corpo não foi lido
+            self._responder(404, {'erro': 'Rota não encontrada.'})
+            return
+        nome, funcao = rotas[caminho]
+        self._atender(nome, lambda: funcao(self._ler_corpo()))
+
+    def _item(self, codigo):
+        item = armazenamento.buscar_item(BASE, codigo)
+        if item is None:
+            raise ErroRequisicao(f'Item {codigo} não encontrado.', status=404)
+        return item
+
+    def _ler_corpo(self):
+        # Em todo erro antes da leitura o corpo fica no socket; a conexão é fechada
+        # depois da resposta para que esses bytes não sejam lidos como outra requisição
+        if self.headers.get('Transfer-Encoding'):
+            self.close_connection = True
+            raise ErroRequisicao('Transfer-Encoding não suportado; envie Content-Length.', status=411)
+        try:
+            tamanho = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            self.close_connection = True
+            raise ErroRequisicao('Cabeçalho Content-Length inválido.')
+        if tamanho < 0:
+            self.close_connection = True
+            raise ErroRequisicao('Cabeçalho Content-Length inválido.')
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            self.close_connection = True
+            raise ErroRequisicao('Requisição grande demais.', status=413)
+        try:
+            corpo = json.loads(self.rfile.read(tamanho) or b'{}')
+        except ValueError:
+            raise ErroRequisicao('O corpo da requisição não é um JSON válido.')
+        if not isinstance(corpo, dict):
+            raise ErroRequisicao('O corpo da requisição deve ser um objeto JSON.')
+        return corpo
+
+    def _atender(self, nome, funcao):
+        try:
+            with metricas.cronometro(f'servico.{nome}'):
+                resposta = funcao()
+        except ErroRequisicao as e:
+            self._responder(e.status, {'erro': str(e)})
+        except Exception as e:
+            self.log_error('Erro em %s: %r', self.path, e)
+            self._responder(500, {'erro': 'Erro interno do servidor.'})
+        else:
+            self._responder(200, resposta)
+
+    def _responder(self, status, conteudo):
+        dados = json.dumps(conteudo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, formato, *args):
+        # Uma linha por requisição atrapalharia com centenas de leituras por segundo
+        pass
+
+
+class ServidorInventario(ThreadingHTTPServer):
+    """ThreadingHTTPServer que atende cada conexão em uma thread (com a sua conexão SQLite)."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, endereco):
+        super().__init__(endereco, ManipuladorInventario)
+
+
+def servir(porta=PORTA, endereco='0.0.0.0'):
+    armazenamento.conectar()  # cria as tabelas (e migra os dados antigos) antes da primeira requisição
+    with ServidorInventario((endereco, porta)) as servidor:
+        print(f'Servindo o inventário em http://{endereco}:{porta}')
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+# --- Linha de comando ---
+def _ler_codigos(codigos):
+    if codigos == ['-']:
+        return [linha.strip() for linha in sys.stdin if linha.strip()]
+    return codigos
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serviço HTTP e linha de comando do inventário.')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    parser_servir = subparsers.add_parser('servir', help='Inicia o serviço HTTP')
+    parser_servir.add_argument('--porta', type=int, default=PORTA)
+    parser_servir.add_argument('--endereco', default='0.0.0.0')
+    parser_buscar = subparsers.add_parser('buscar', help='Busca itens pelo código')
+    parser_buscar.add_argument('codigos', nargs='+', help='Códigos (ou "-" para ler da entrada padrão)')
+    parser_situacao = subparsers.add_parser('situacao', help='Atualiza a situação de vários itens')
+    parser_situacao.add_argument('situacao', choices=esquema.OPCOES_SITUACAO)
+    parser_situacao.add_argument('codigos', nargs='+', help='Códigos (ou "-" para ler da entrada padrão)')
+    parser_situacao.add_argument('--comentario')
+    parser_gravar = subparsers.add_parser('gravar', help='Insere ou atualiza os itens de um arquivo JSON (lista)')
+    parser_gravar.add_argument('arquivo')
+    args = parser.parse_args()
+
+    try:
+        if args.comando == 'servir':
+            servir(args.porta, args.endereco)
+        elif args.comando == 'buscar':
+            print(json.dumps(buscar(_ler_codigos(args.codigos)), ensure_ascii=False, indent=2))
+        elif args.comando == 'situacao':
+            print(json.dumps(
+                atualizar_situacao(_ler_codigos(args.codigos), args.situacao, args.comentario),
+                ensure_ascii=False
+            ))
+        else:
+            with open(args.arquivo, encoding='utf-8') as arquivo:
+                print(json.dumps(gravar(json.load(arquivo)), ensure_ascii=False))
+    except ErroRequisicao as e:
+        parser.exit(1, f'Erro: {e}\n')